@@ -0,0 +1,380 @@
+"""
+    backends.py
+
+    LP solver backends for branch_cut and the linear program components
+
+    a backend holds one LP model,
+
+        minimize f.x  subject to  A x <= b,  Aeq x = beq,  lb <= x <= ub
+
+    which can be modified and solved again:
+
+        lp = get_backend('highs')
+        lp.load(f, A, b, lb, ub)
+        x, fun, eflag = lp.solve()
+        lp.set_bounds(lb, ub, index)
+        lp.add_rows(A_new, b_new)
+        lp.set_basis(basis)
+        x, fun, eflag = lp.solve()
+        lp.reset_basis()
+
+    the available backends are:
+        lpsolve     lp_solve 5.5 (http://lpsolve.sourceforge.net)
+        linprog     scipy.optimize.linprog, with the simplex method unless
+                    another is given by the method option (with HiGHS on
+                    SciPy >= 1.11, which no longer has the simplex method)
+        highs       scipy.optimize.linprog with the HiGHS solvers, the
+                    constraints are kept sparse (requires SciPy >= 1.6)
+
+    only lpsolve provides the optimal basis and can be warm started from it.
+    linprog does not return its basis, so the linprog and highs backends
+    give the basis of the vertex they found (see cuts.basis_from_solution)
+    as the basic indices for the cuts of cuts.py.
+
+    solve() returns an exit flag with the same meaning as in branch_cut.m:
+        1 optimized, 0 max iterations, -2 infeasible, -3 unbounded, -1 other
+"""
+
+from distutils.version import LooseVersion
+
+import numpy as np
+import scipy
+
+from scipy.sparse import csr_matrix, issparse, vstack
+
+
+def get_backend(name, **options):
+    """ returns a new instance of the named backend,
+        the options are passed to the backend
+    """
+    try:
+        cls = backends[name]
+    except KeyError:
+        raise ValueError("unknown LP backend '%s', the available backends are: %s"
+                         % (name, ', '.join(sorted(backends))))
+    return cls(**options)
+
+
+class Backend(object):
+    """ the interface of an LP backend
+    """
+
+    # the number of simplex iterations of the last solve
+    iterations = 0
+
+    def load(self, f, A, b, lb, ub, Aeq=None, beq=None):
+        """ load the LP model, replacing any model already loaded
+        """
+        raise NotImplementedError()
+
+    def solve(self):
+        """ solve the model, returns the solution x, the objective
+            value and the exit flag
+        """
+        raise NotImplementedError()
+
+    def set_bounds(self, lb, ub, index=None):
+        """ set the bounds of the variables with the given indices
+            (all variables if index is None)
+        """
+        raise NotImplementedError()
+
+    def add_rows(self, A, b):
+        """ add the inequality constraints A x <= b
+        """
+        raise NotImplementedError()
+
+    def get_basis(self):
+        """ returns the optimal basis of the last solve,
+            or None if the backend does not provide it
+        """
+        return None
+
+    def get_basic_indices(self):
+        """ returns the indices of the basic variables of the last solve in
+            [x, s], where s are the slacks of the rows (inequalities first),
+            or None if there is no solution
+        """
+        return None
+
+    def set_basis(self, basis):
+        """ set the starting basis for the next solve (e.g. the optimal basis
+            of the parent of a branch and bound node), backends that can not
+            be warm started ignore it
+        """
+        pass
+
+    def reset_basis(self):
+        """ start the next solve from the initial (slack) basis rather than
+            the basis of the last solve, backends that can not be warm
+            started ignore it
+        """
+        pass
+
+    def get_duals(self):
+        """ returns the dual values of the inequality constraints of the last
+            solve (the change in the objective value per unit increase of
+            each b), or None if the backend does not provide them
+        """
+        return None
+
+    def delete(self):
+        """ release the model
+        """
+        pass
+
+
+class LinprogBackend(Backend):
+    """ scipy.optimize.linprog
+
+        linprog holds no model, so the model is kept here and passed to
+        linprog in full by each solve
+    """
+
+    method = 'simplex'
+
+    # keep the constraint matrices sparse
+    sparse = False
+
+    def __init__(self, method=None, options=None):
+        if method is not None:
+            self.method = method
+        if self.method == 'simplex' and not has_simplex():
+            self.method = 'highs'
+        if options is None:
+            options = {'maxiter': 1000}
+            if self.method == 'simplex':
+                # the default (1e-12) fails on some of the branched problems
+                options['tol'] = 1e-9
+        self.options = options
+        self.results = None
+
+    def load(self, f, A, b, lb, ub, Aeq=None, beq=None):
+        self.f  = np.asarray(f, dtype=float).flatten()
+        self.A  = _matrix(A, self.sparse)
+        self.b  = np.asarray(b, dtype=float).flatten()
+        self.lb = np.array(lb, dtype=float).flatten()
+        self.ub = np.array(ub, dtype=float).flatten()
+
+        if Aeq is None or np.size(Aeq) == 0:
+            self.Aeq = None
+            self.beq = None
+        else:
+            self.Aeq = _matrix(Aeq, self.sparse)
+            self.beq = np.asarray(beq, dtype=float).flatten()
+
+    def solve(self):
+        try:
+            from scipy.optimize import linprog
+        except ImportError:
+            raise ImportError('SciPy version >= 0.15.0 is required for linprog support')
+
+        bounds = [(l if np.isfinite(l) else None, u if np.isfinite(u) else None)
+                  for l, u in zip(self.lb, self.ub)]
+
+        results = linprog(self.f,
+                          A_ub=self.A,   b_ub=self.b,
+                          A_eq=self.Aeq, b_eq=self.beq,
+                          bounds=bounds, method=self.method,
+                          options=self.options)
+
+        self.results = results
+        self.iterations = results.nit
+
+        # translate status to MATLAB equivalent exit flag
+        if results.status == 0:         # optimized
+            eflag = 1
+        elif results.status == 1:       # max iterations
+            eflag = 0
+        elif results.status == 2:       # infeasible
+            eflag = -2
+        elif results.status == 3:       # unbounded
+            eflag = -3
+        else:
+            eflag = -1
+
+        return results.x, results.fun, eflag
+
+    def set_bounds(self, lb, ub, index=None):
+        if index is None:
+            index = slice(None)
+        self.lb[index] = np.asarray(lb, dtype=float).flatten()
+        self.ub[index] = np.asarray(ub, dtype=float).flatten()
+
+    def add_rows(self, A, b):
+        A = _matrix(A, self.sparse)
+        if issparse(A):
+            self.A = vstack((self.A, A)).tocsr()
+        else:
+            self.A = np.concatenate((self.A, A))
+        self.b = np.append(self.b, b)
+
+    def get_basic_indices(self):
+        # linprog does not return its basis, the basis of the vertex it
+        # found is used instead
+        if self.results is None or self.results.x is None:
+            return None
+
+        from cuts import basis_from_solution, standard_form
+        Acom, bcom, lz, uz = standard_form(self.A, self.b, self.Aeq, self.beq, self.lb, self.ub)
+        x = np.asarray(self.results.x, dtype=float).flatten()
+        z = np.concatenate((x, bcom - Acom[:, :len(x)].dot(x)))
+        return basis_from_solution(Acom, z, lz, uz)
+
+    def get_duals(self):
+        # only the HiGHS methods return the marginals
+        ineqlin = self.results.get('ineqlin') if self.results is not None else None
+        if ineqlin is None:
+            return None
+        return np.asarray(ineqlin.marginals)
+
+
+class HighsBackend(LinprogBackend):
+    """ scipy.optimize.linprog with the HiGHS solvers
+    """
+
+    method = 'highs'
+    sparse = True
+
+
+class LPSolveBackend(Backend):
+    """ lp_solve 5.5, the model is kept by lp_solve between solves
+    """
+
+    def __init__(self):
+        self.lp = None
+
+    def load(self, f, A, b, lb, ub, Aeq=None, beq=None):
+        try:
+            from lpsolve55 import lpsolve
+        except ImportError:
+            raise ImportError('lpsolve is not available')
+        self.lpsolve = lpsolve
+
+        self.delete()
+
+        obj = np.asarray(f, dtype=float).flatten().tolist()
+        self.lp = lpsolve('make_lp', 0, len(obj))
+        self.ncols = len(obj)
+        lpsolve('set_verbose', self.lp, 'IMPORTANT')
+
+        # the duals are only available with sensitivity analysis
+        lpsolve('set_sensitivity', self.lp, True)
+        lpsolve('set_obj_fn', self.lp, obj)
+
+        self.nrows = 0
+        self.equality = np.zeros(0, dtype=bool)
+        self._add_rows(A, b, 'LE')
+        if Aeq is not None and np.size(Aeq) > 0:
+            self._add_rows(Aeq, beq, 'EQ')
+
+        lpsolve('set_lowbo', self.lp, np.asarray(lb, dtype=float).flatten().tolist())
+        lpsolve('set_upbo',  self.lp, np.asarray(ub, dtype=float).flatten().tolist())
+
+    def solve(self):
+        lpsolve = self.lpsolve
+
+        results = lpsolve('solve', self.lp)
+
+        x   = np.array(lpsolve('get_variables', self.lp)[0])
+        fun = lpsolve('get_objective', self.lp)
+        self.iterations = lpsolve('get_total_iter', self.lp)
+
+        # translate results to MATLAB equivalent exit flag
+        if results == 0:            # optimized
+            eflag = 1
+        elif results == 2:          # infeasible
+            eflag = -2
+        elif results == 3:          # unbounded
+            eflag = -3
+        else:
+            eflag = -1
+
+        return x, fun, eflag
+
+    def set_bounds(self, lb, ub, index=None):
+        lb = np.asarray(lb, dtype=float).flatten()
+        ub = np.asarray(ub, dtype=float).flatten()
+        if index is None:
+            self.lpsolve('set_lowbo', self.lp, lb.tolist())
+            self.lpsolve('set_upbo',  self.lp, ub.tolist())
+        else:
+            for i, l, u in zip(np.asarray(index).flatten(), lb, ub):
+                self.lpsolve('set_bounds', self.lp, int(i)+1, l, u)
+
+    def add_rows(self, A, b):
+        self._add_rows(A, b, 'LE')
+
+    def _add_rows(self, A, b, con_type):
+        """ add the constraints, passing only the non-zeros of each row
+        """
+        A = csr_matrix(A, dtype=float)
+        b = np.asarray(b, dtype=float).flatten()
+        for i in xrange(A.shape[0]):
+            row = slice(A.indptr[i], A.indptr[i+1])
+            self.lpsolve('add_constraintex', self.lp, A.data[row].tolist(),
+                         (A.indices[row] + 1).tolist(), con_type, b[i])
+        self.nrows += A.shape[0]
+        self.equality = np.append(self.equality, [con_type == 'EQ'] * A.shape[0])
+
+    def get_basis(self):
+        return self.lpsolve('get_basis', self.lp, True)
+
+    def get_basic_indices(self):
+        # the basic variables are numbered rows first, from 1, and the rows
+        # are in the order they were added (the inequalities added after the
+        # equalities are moved before them)
+        basic = np.abs(np.array(self.lpsolve('get_basis', self.lp, False))) - 1
+        position = np.argsort(np.argsort(self.equality, kind='mergesort'))
+        is_row = basic < self.nrows
+        basic[is_row] = position[basic[is_row]] + self.ncols
+        basic[~is_row] -= self.nrows
+        return basic
+
+    def set_basis(self, basis):
+        self.lpsolve('set_basis', self.lp, basis, True)
+
+    def reset_basis(self):
+        self.lpsolve('default_basis', self.lp)
+
+    def get_duals(self):
+        duals = self.lpsolve('get_dual_solution', self.lp)
+
+        # the driver may return the return code of the call with the duals
+        if len(duals) == 2 and np.ndim(duals[0]) > 0:
+            duals = duals[0]
+
+        # the row duals are followed by the reduced costs
+        duals = np.asarray(duals, dtype=float).flatten()
+        if len(duals) != self.nrows + self.ncols:
+            raise RuntimeError('lp_solve returned %d dual values for %d rows and %d columns'
+                               % (len(duals), self.nrows, self.ncols))
+        return duals[:self.nrows]
+
+    def delete(self):
+        if self.lp is not None:
+            self.lpsolve('delete_lp', self.lp)
+            self.lp = None
+
+
+def has_simplex():
+    """ True if linprog has the simplex method (removed in SciPy 1.11)
+    """
+    return LooseVersion(scipy.__version__) < LooseVersion('1.11')
+
+
+def _matrix(A, sparse):
+    """ A as a 2-D float array, or CSR matrix if sparse
+    """
+    if sparse:
+        return csr_matrix(A, dtype=float)
+    if issparse(A):
+        return A.toarray()
+    return np.atleast_2d(np.asarray(A, dtype=float))
+
+
+backends = {
+    'lpsolve': LPSolveBackend,
+    'linprog': LinprogBackend,
+    'highs':   HighsBackend,
+}
@@ -0,0 +1,245 @@
+"""
+    cache.py
+
+    a binary cache for the MATLAB data files
+
+    the first time a .mat file is loaded it is converted into a directory of
+    native .npy files (one per struct field), which are then opened with
+    np.load(mmap_mode='r') on every subsequent load. repeated runs and worker
+    processes thereby share pages instead of re-parsing the MATLAB structs.
+
+    a cache entry is reused as long as the size and mtime of the source file
+    are unchanged. if they differ, the SHA-1 of the source is compared to the
+    one recorded when the entry was built and the entry is rebuilt only if the
+    content has actually changed.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import cPickle as pickle
+
+from os.path import abspath, basename, exists, getmtime, getsize, join, splitext
+
+from scipy.io import loadmat
+
+import numpy as np
+
+# location of the cache, by default alongside the MATLAB data files
+cache_path = join(os.path.dirname(__file__), os.pardir, os.pardir, 'MATLAB', 'Data', '.cache')
+
+# bump when the layout of a cache entry changes
+CACHE_VERSION = 1
+
+MANIFEST = 'manifest.json'
+
+
+class MatStruct(object):
+    """ stand-in for the scipy mat_struct, populated from a cache entry
+
+        array fields are memory mapped on first access
+    """
+    def __init__(self, fieldnames=(), arrays=None):
+        self._fieldnames = list(fieldnames)
+        self._arrays = arrays or {}
+
+    def __getattr__(self, name):
+        arrays = self.__dict__.get('_arrays', {})
+        if name in arrays:
+            value = np.load(arrays[name], mmap_mode='r')
+            setattr(self, name, value)
+            return value
+        raise AttributeError(name)
+
+
+def load_cached(file_name, variable_names=None):
+    """ load the MATLAB file, using (and if necessary building) its cache entry
+
+        returns a dict of variables as loadmat(squeeze_me=True,
+        struct_as_record=False) would, except that numeric struct fields are
+        read-only arrays that are memory mapped when first accessed. if the
+        cache cannot be written, the result of loadmat is returned directly
+
+        if variable_names is given, only those variables are read
+    """
+    entry = _entry_path(file_name)
+
+    manifest = _valid_manifest(entry, file_name)
+    if manifest is None:
+        try:
+            manifest = _build(entry, file_name)
+        except (IOError, OSError):
+            return _loadmat(file_name, variable_names)
+
+    return _read(entry, manifest, variable_names)
+
+
+def _loadmat(file_name, variable_names=None):
+    return loadmat(file_name, variable_names=variable_names,
+                   squeeze_me=True, struct_as_record=False)
+
+
+def _entry_path(file_name):
+    """ a cache entry is named for the source file, qualified by a hash of
+        its absolute path so that like-named files don't collide
+    """
+    path = abspath(file_name)
+    tag = hashlib.sha1(path).hexdigest()[:8]
+    return join(cache_path, '%s-%s' % (splitext(basename(path))[0], tag))
+
+
+def _source_info(file_name):
+    return {'size': getsize(file_name), 'mtime': getmtime(file_name)}
+
+
+def _sha1(file_name):
+    sha = hashlib.sha1()
+    with open(file_name, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _valid_manifest(entry, file_name):
+    """ return the manifest of the cache entry if it is current, else None
+    """
+    try:
+        with open(join(entry, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (IOError, ValueError):
+        return None
+
+    if manifest.get('version') != CACHE_VERSION:
+        return None
+
+    source = manifest['source']
+    info = _source_info(file_name)
+    if source['size'] == info['size'] and source['mtime'] == info['mtime']:
+        return manifest
+
+    # file was touched, only rebuild if the content has changed
+    if source['size'] != info['size'] or source['sha1'] != _sha1(file_name):
+        return None
+
+    source.update(info)
+    try:
+        _write_manifest(entry, manifest)
+    except (IOError, OSError):
+        pass
+    return manifest
+
+
+def _write_manifest(entry, manifest):
+    tmp = join(entry, MANIFEST + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f)
+    os.rename(tmp, join(entry, MANIFEST))
+
+
+def _build(entry, file_name):
+    """ convert the MATLAB file into a new cache entry
+
+        the entry is assembled in a temporary directory and moved into place
+        when complete, so concurrent readers never see a partial entry
+    """
+    source = _source_info(file_name)
+    source['sha1'] = _sha1(file_name)
+
+    mat = _loadmat(file_name)
+
+    if not exists(cache_path):
+        try:
+            os.makedirs(cache_path)
+        except OSError:
+            if not exists(cache_path):
+                raise
+
+    tmp = tempfile.mkdtemp(prefix='.build-', dir=cache_path)
+    try:
+        structs = {}
+        other = {}
+        for name, value in mat.iteritems():
+            if name.startswith('__'):
+                continue
+            if hasattr(value, '_fieldnames'):
+                structs[name] = _write_struct(tmp, name, value)
+            else:
+                other[name] = value
+
+        with open(join(tmp, 'variables.pkl'), 'wb') as f:
+            pickle.dump(other, f, pickle.HIGHEST_PROTOCOL)
+
+        manifest = {
+            'version': CACHE_VERSION,
+            'source':  source,
+            'structs': structs,
+        }
+        _write_manifest(tmp, manifest)
+
+        # replace any stale entry
+        if exists(entry):
+            stale = tempfile.mkdtemp(prefix='.stale-', dir=cache_path)
+            try:
+                os.rename(entry, join(stale, 'entry'))
+            except OSError:
+                pass
+            shutil.rmtree(stale, ignore_errors=True)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # another process got there first
+            if _valid_manifest(entry, file_name) is None:
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return manifest
+
+
+def _write_struct(path, name, struct):
+    """ write each numeric field of the struct to its own .npy file,
+        anything else (scalars, strings, nested structs) is pickled
+    """
+    arrays = []
+    other = {}
+    for field in struct._fieldnames:
+        value = getattr(struct, field)
+        if isinstance(value, np.ndarray) and value.dtype != object and value.size > 0:
+            np.save(join(path, '%s.%s.npy' % (name, field)), np.ascontiguousarray(value))
+            arrays.append(field)
+        else:
+            other[field] = value
+
+    with open(join(path, '%s.pkl' % name), 'wb') as f:
+        pickle.dump(other, f, pickle.HIGHEST_PROTOCOL)
+
+    return {'fields': list(struct._fieldnames), 'arrays': arrays}
+
+
+def _read(entry, manifest, variable_names=None):
+    """ open a cache entry, the array fields are memory mapped on demand
+    """
+    with open(join(entry, 'variables.pkl'), 'rb') as f:
+        mat = pickle.load(f)
+
+    if variable_names is not None:
+        mat = dict((name, mat[name]) for name in variable_names if name in mat)
+
+    for name, layout in manifest['structs'].iteritems():
+        name = str(name)
+        if variable_names is not None and name not in variable_names:
+            continue
+
+        arrays = dict((str(field), join(entry, '%s.%s.npy' % (name, field)))
+                      for field in layout['arrays'])
+        struct = MatStruct((str(field) for field in layout['fields']), arrays)
+
+        with open(join(entry, '%s.pkl' % name), 'rb') as f:
+            for field, value in pickle.load(f).iteritems():
+                setattr(struct, field, value)
+
+        mat[name] = struct
+
+    return mat
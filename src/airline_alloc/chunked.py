@@ -0,0 +1,235 @@
+"""
+    chunked.py
+
+    a chunked, columnar storage format for datasets
+
+    a store is a directory holding a manifest and one .npy file per struct
+    field, except that the aircraft/route tables (2-D arrays with a column for
+    each route) are split into blocks of route columns. when a dataset is
+    filtered, only the blocks that contain the selected routes are read, so
+    I/O scales with the size of the sub-network rather than the full network.
+
+    blocks are memory mapped, or if the store is compressed they are stored
+    as compressed .npz files and decompressed when read.
+
+    usage: python chunked.py <suffix> <store>
+"""
+
+import os
+import json
+import cPickle as pickle
+
+from os.path import exists, join
+
+import numpy as np
+
+from cache import MatStruct
+
+STORE_VERSION = 1
+
+MANIFEST = 'manifest.json'
+
+
+def is_store(path):
+    """ True if path is a chunked store
+    """
+    return exists(join(path, MANIFEST))
+
+
+def convert(data, dest, block_size=256, compress=False):
+    """ write the four structs of a dataset to a chunked store at dest
+    """
+    if not exists(dest):
+        os.makedirs(dest)
+
+    num_routes = len(data.inputs.RVector)
+
+    structs = {}
+    for key in data.structs:
+        struct = getattr(data, key.lower())
+        layout = {'fields': list(struct._fieldnames), 'arrays': [], 'chunked': {}}
+        other = {}
+
+        for field in struct._fieldnames:
+            value = getattr(struct, field)
+            if not isinstance(value, np.ndarray) or value.dtype == object or value.size == 0:
+                other[field] = value
+            elif value.ndim == 2 and value.shape[1] == num_routes:
+                layout['chunked'][field] = _write_blocks(join(dest, '%s.%s' % (key, field)),
+                                                         value, block_size, compress)
+            else:
+                np.save(join(dest, '%s.%s.npy' % (key, field)), np.ascontiguousarray(value))
+                layout['arrays'].append(field)
+
+        with open(join(dest, '%s.pkl' % key), 'wb') as f:
+            pickle.dump(other, f, pickle.HIGHEST_PROTOCOL)
+
+        structs[key] = layout
+
+    manifest = {
+        'version':    STORE_VERSION,
+        'block_size': block_size,
+        'compressed': compress,
+        'structs':    structs,
+    }
+    with open(join(dest, MANIFEST), 'w') as f:
+        json.dump(manifest, f)
+
+
+def _write_blocks(path, value, block_size, compress):
+    if not exists(path):
+        os.makedirs(path)
+
+    for b, start in enumerate(xrange(0, value.shape[1], block_size)):
+        block = np.ascontiguousarray(value[:, start:start+block_size])
+        if compress:
+            np.savez_compressed(join(path, '%d.npz' % b), block=block)
+        else:
+            np.save(join(path, '%d.npy' % b), block)
+
+    return {'shape': list(value.shape), 'dtype': value.dtype.str}
+
+
+def load_store(path, variable_names=None):
+    """ open a chunked store, returning a dict of structs as load_data does
+
+        the route tables are ChunkedArrays, other arrays are memory mapped
+        on first access
+    """
+    with open(join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+
+    if manifest.get('version') != STORE_VERSION:
+        raise IOError('unsupported store version in %s' % path)
+
+    mat = {}
+    for key, layout in manifest['structs'].iteritems():
+        key = str(key)
+        if variable_names is not None and key not in variable_names:
+            continue
+
+        arrays = dict((str(field), join(path, '%s.%s.npy' % (key, field)))
+                      for field in layout['arrays'])
+        struct = MatStruct((str(field) for field in layout['fields']), arrays)
+
+        with open(join(path, '%s.pkl' % key), 'rb') as f:
+            for field, value in pickle.load(f).iteritems():
+                setattr(struct, field, value)
+
+        for field, info in layout['chunked'].iteritems():
+            field = str(field)
+            setattr(struct, field, ChunkedArray(join(path, '%s.%s' % (key, field)),
+                                                info['shape'], info['dtype'],
+                                                manifest['block_size'], manifest['compressed']))
+
+        mat[key] = struct
+
+    return mat
+
+
+class ChunkedArray(object):
+    """ a 2-D aircraft/route table stored in blocks of route columns
+    """
+
+    ndim = 2
+
+    def __init__(self, path, shape, dtype, block_size, compressed=False):
+        self.path       = path
+        self.shape      = tuple(shape)
+        self.dtype      = np.dtype(dtype)
+        self.block_size = block_size
+        self.compressed = compressed
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __array__(self, dtype=None):
+        value = self.take(np.arange(self.shape[0]), np.arange(self.shape[1]))
+        return value if dtype is None else value.astype(dtype)
+
+    def __getitem__(self, key):
+        """ integers, slices and integer arrays read only the blocks of the
+            selected route columns, any other key reads the whole table
+        """
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) == 1:
+            key = key + (slice(None),)
+
+        index = None
+        if len(key) == 2:
+            rows = self._axis_index(key[0], 0)
+            cols = self._axis_index(key[1], 1)
+            if rows is not None and cols is not None:
+                index = rows, cols
+
+        if index is None:
+            return np.asarray(self)[key]
+
+        (rows, row_kind), (cols, col_kind) = index
+        if row_kind == col_kind == 'array':
+            # the arrays are indexed pointwise, as numpy does
+            rows, cols = np.broadcast_arrays(rows, cols)
+            ur, ri = np.unique(rows, return_inverse=True)
+            uc, ci = np.unique(cols, return_inverse=True)
+            return self.take(ur, uc)[ri, ci]
+
+        result = self.take(rows, cols)
+        if col_kind == 'scalar':
+            result = result[:, 0]
+        if row_kind == 'scalar':
+            result = result[0]
+        return result
+
+    def _axis_index(self, key, axis):
+        """ the indices selected by an integer, slice or 1-D integer array
+            key along the given axis and the kind of key ('scalar', 'slice'
+            or 'array'), or None for any other key
+        """
+        n = self.shape[axis]
+        if isinstance(key, slice):
+            return np.arange(*key.indices(n)), 'slice'
+
+        ind = np.asarray(key)
+        if ind.ndim > 1 or (ind.size > 0 and ind.dtype.kind not in 'iu'):
+            return None
+
+        ind = ind.astype(int)
+        if np.any((ind < -n) | (ind >= n)):
+            raise IndexError('index out of bounds for axis %d with size %d' % (axis, n))
+        ind = np.where(ind < 0, ind + n, ind)
+        if ind.ndim == 0:
+            return ind.reshape(1), 'scalar'
+        return ind, 'array'
+
+    def read_block(self, b):
+        """ read the block of route columns [b*block_size, (b+1)*block_size)
+        """
+        if self.compressed:
+            with np.load(join(self.path, '%d.npz' % b)) as npz:
+                return npz['block']
+        return np.load(join(self.path, '%d.npy' % b), mmap_mode='r')
+
+    def take(self, rows, cols):
+        """ gather the given rows (aircraft) and columns (routes),
+            reading only the blocks that contain the selected columns
+        """
+        rows = np.asarray(rows, dtype=int).ravel()
+        cols = np.asarray(cols, dtype=int).ravel()
+
+        result = np.empty((len(rows), len(cols)), dtype=self.dtype)
+
+        blocks = cols // self.block_size
+        for b in np.unique(blocks):
+            sel = np.flatnonzero(blocks == b)
+            block = self.read_block(b)
+            result[:, sel] = block[np.ix_(rows, cols[sel] - b*self.block_size)]
+
+        return result
+
+
+if __name__ == "__main__":
+    import sys
+    from dataset import Dataset
+
+    convert(Dataset(suffix=sys.argv[1]).prefetch(), sys.argv[2])
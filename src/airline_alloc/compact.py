@@ -0,0 +1,94 @@
+"""
+    compact.py
+
+    a compact, struct-of-arrays representation of a (filtered) dataset
+
+    only the fields that are read by the optimization and output code are
+    kept, as contiguous float64 arrays in classes with __slots__. this keeps
+    the footprint of a scenario small and makes pickling it to worker
+    processes cheap. unlike a FilteredDataset, a CompactDataset holds no
+    reference to the base dataset it was filtered from.
+"""
+
+import numpy as np
+
+
+class Struct(object):
+    """ base class for the compact structs, the fields are the slots
+    """
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def copy(self, **fields):
+        """ returns a copy of the struct with the given fields replaced,
+            the other fields are shared with this struct
+        """
+        struct = self.__class__.__new__(self.__class__)
+        for name in self.__slots__:
+            setattr(struct, name, fields.get(name, getattr(self, name)))
+        return struct
+
+    @property
+    def nbytes(self):
+        """ the total size of the arrays in bytes
+        """
+        return sum(getattr(self, name).nbytes for name in self.__slots__
+                   if isinstance(getattr(self, name), (np.ndarray, Struct)))
+
+
+class Inputs(Struct):
+    __slots__ = ('RVector', 'DVector', 'AvailPax', 'ACNum', 'TurnAround', 'MaxTrip')
+
+
+class Outputs(Struct):
+    __slots__ = ('TicketPrice',)
+
+
+class Constants(Struct):
+    __slots__ = ('MH', 'FuelCost')
+
+
+class Coefficients(Struct):
+    __slots__ = ('Fuelburn', 'Doc', 'Nox', 'BlockTime')
+
+
+class CompactDataset(Struct):
+    """ a dataset with the same four structs as Dataset,
+        holding only the fields used by the optimization
+    """
+    __slots__ = ('inputs', 'outputs', 'constants', 'coefficients')
+
+
+def compact(data):
+    """ convert a dataset (or the structs loaded from the MATLAB files)
+        into a CompactDataset
+
+        arrays are copied into contiguous float64 arrays and scalars converted
+        to float, fields that are not present (e.g. MaxTrip before filtering)
+        are None
+    """
+    structs = {}
+    for name, cls in [('inputs', Inputs), ('outputs', Outputs),
+                      ('constants', Constants), ('coefficients', Coefficients)]:
+        struct = getattr(data, name)
+        fields = {}
+        for field in cls.__slots__:
+            value = getattr(struct, field, None)
+            if np.isscalar(value):
+                value = float(value)
+            elif value is not None:
+                value = np.array(value, dtype=np.float64, order='C')
+            fields[field] = value
+        structs[name] = cls(**fields)
+
+    return CompactDataset(**structs)
@@ -0,0 +1,402 @@
+"""
+    cuts.py
+
+    Gomory mixed integer (GMI) cuts for branch_cut, and the pool of cuts
+
+    the cuts are derived from the rows of the optimal simplex tableau of the
+    LP relaxation, in the space of the variables and the slacks of the rows,
+
+        A x + s = b,  Aeq x + s_eq = beq,  lb <= x <= ub,  s >= 0,  s_eq = 0
+
+    using the basis given by the solver backend (see
+    Backend.get_basic_indices). scipy's linprog does not return its basis, so
+    for the linprog and highs backends it is the basis of the vertex x found
+    by the solver (the variables strictly between their bounds, completed
+    with slacks, see basis_from_solution). each tableau row whose basic
+    variable is a fractional integer variable gives a cut, which is mapped
+    back to a row a x <= beta.
+
+    the basis matrix is factorized once (sparse LU) and only the tableau rows
+    of the fractional integer variables are computed from it (see Tableau),
+    so the rows are kept sparse throughout.
+
+    the cuts found in each round are kept in a CutPool, which adds the most
+    efficacious cuts that are violated by the LP solution to the model and
+    drops the cuts that have not been tight for a number of rounds (aging).
+
+    the cuts are found on the root problem, so they are valid for the whole
+    tree. branch_cut keeps a single pool for the tree: the root cuts are
+    added to the LP model of the tree, and at each node the pool cuts that
+    are violated by the node's solution are added to the model for the nodes
+    solved after it, while the others age.
+"""
+
+import numpy as np
+
+from scipy.linalg import lu, qr
+from scipy.sparse import csc_matrix, csr_matrix, hstack, identity, issparse, vstack
+from scipy.sparse.linalg import splu
+
+from backends import get_backend
+
+
+def gmi_cuts(x, A, b, Aeq, beq, lb, ub, num_int, basis=None,
+             min_frac=0.005, max_dynamism=1e6):
+    """ the GMI cuts of the LP solution x, from the rows of the optimal
+        tableau whose basic variable is one of the first num_int (integer)
+        variables and is fractional
+
+        basis is the indices of the basic variables in [x, s, s_eq], if None
+        it is found from x
+
+        returns A_cut, b_cut
+    """
+    Acom, bcom, lz, uz = standard_form(A, b, Aeq, beq, lb, ub)
+    m, n = Acom.shape[0], len(lz) - Acom.shape[0]
+
+    x = np.asarray(x, dtype=float).flatten()
+    z = np.concatenate((x, bcom - Acom[:, :n].dot(x)))
+
+    if basis is None:
+        basis = basis_from_solution(Acom, z, lz, uz)
+    basis = np.asarray(basis, dtype=int)
+
+    # the basic integer variables that are fractional in x
+    frac = z[basis] - np.floor(z[basis])
+    rows = np.flatnonzero((basis < num_int) & (frac >= min_frac) & (frac <= 1 - min_frac))
+    if len(rows) == 0:
+        return np.zeros((0, n)), np.zeros(0)
+
+    try:
+        tableau = Tableau(Acom, bcom, basis)
+    except RuntimeError:
+        # the basis matrix is singular
+        return np.zeros((0, n)), np.zeros(0)
+
+    nonbasic = np.ones(n+m, dtype=bool)
+    nonbasic[basis] = False
+
+    # the nonbasic variables are at the bound nearest to their value,
+    # t = sign*(z - bound) >= 0 is the distance from the bound
+    at_ub = np.isfinite(uz) & (np.abs(z - uz) < np.abs(z - lz))
+    sign  = np.where(at_ub, -1., 1.)
+    bound = np.where(at_ub, uz, lz)
+
+    # the integer variables at integer bounds
+    is_int = np.zeros(n+m, dtype=bool)
+    is_int[:num_int] = np.abs(bound[:num_int] - np.round(bound[:num_int])) <= 1e-9
+
+    A_cut = []
+    b_cut = []
+    for r in rows:
+        row = tableau.row(r) * nonbasic
+        row[np.abs(row) < 1e-11] = 0.
+
+        # z_k + sum(a_j t_j) = value, over the nonbasic variables
+        used = row != 0
+        if np.any(used & ~np.isfinite(bound)):
+            continue
+        a = row * sign
+        value = tableau.values[r] - row[used].dot(bound[used])
+
+        f0 = value - np.floor(value)
+        if f0 < min_frac or f0 > 1 - min_frac:
+            continue
+
+        # the GMI cut, sum(gamma_j t_j) >= 1
+        fj = a - np.floor(a)
+        gamma = np.where(a >= 0, a / f0, -a / (1 - f0))
+        gamma[is_int] = np.where(fj <= f0, fj / f0, (1 - fj) / (1 - f0))[is_int]
+        gamma[~used] = 0.
+
+        # in terms of z, then of x (s = bcom - Acom x)
+        alpha = gamma * sign
+        rhs = 1 + alpha[used].dot(bound[used])
+        alpha_x = alpha[:n] - Acom[:, :n].T.dot(alpha[n:])
+        rhs = rhs - alpha[n:].dot(bcom)
+
+        cut = _clean(-alpha_x, -rhs, lb, ub, max_dynamism)
+        if cut is not None:
+            A_cut.append(cut[0])
+            b_cut.append(cut[1])
+
+    return np.array(A_cut).reshape(-1, n), np.array(b_cut)
+
+
+class Tableau(object):
+    """ rows of the simplex tableau (B\\Acom, B\\bcom) of a basis
+
+        the basis matrix B is factorized (sparse LU) once, and each row is
+        computed from it when it is needed, as y' Acom where B' y = e_r
+    """
+
+    def __init__(self, Acom, bcom, basis):
+        self.Acom = csc_matrix(Acom, dtype=float)
+        self.basis = np.asarray(basis, dtype=int)
+
+        # raises RuntimeError if B is singular
+        self.lu = splu(self.Acom[:, basis].tocsc())
+
+        # the values of the basic variables
+        self.values = self.lu.solve(np.asarray(bcom, dtype=float).flatten())
+
+    def row(self, r):
+        """ the row of the tableau for the r-th basic variable
+        """
+        e = np.zeros(self.Acom.shape[0])
+        e[r] = 1.
+        y = self.lu.solve(e, trans='T')
+        row = self.Acom.T.dot(y)
+
+        # the columns of the basis are exactly those of the identity
+        row[self.basis] = 0.
+        row[self.basis[r]] = 1.
+        return row
+
+
+def basis_from_solution(Acom, z, lz, uz, tol=1e-9):
+    """ a basis for the vertex z of  Acom z = bcom,  lz <= z <= uz: the
+        linearly independent columns of the variables strictly between their
+        bounds, completed with the slacks of the rows they do not cover
+    """
+    Acom = csc_matrix(Acom, dtype=float)
+    m = Acom.shape[0]
+    n = Acom.shape[1] - m
+
+    with np.errstate(invalid='ignore'):
+        above = np.isinf(lz) | (z > lz + tol * (1 + np.abs(lz)))
+        below = np.isinf(uz) | (z < uz - tol * (1 + np.abs(uz)))
+    cand = np.flatnonzero(above & below)
+
+    if len(cand) == m:
+        # a nondegenerate vertex, the candidates are the basis
+        try:
+            splu(Acom[:, cand])
+            return cand
+        except RuntimeError:
+            pass
+
+    if len(cand) > 0:
+        # an independent subset of the candidates
+        Q, R, piv = qr(Acom[:, cand].toarray(), mode='economic', pivoting=True)
+        diag = np.abs(np.diag(R))
+        rank = int(np.sum(diag > 1e-9 * diag[0])) if diag[0] > 0 else 0
+        cand = cand[np.sort(piv[:rank])]
+
+    if len(cand) > 0:
+        # the rows pivoted on by the candidates
+        P, L, U = lu(Acom[:, cand].toarray())
+        covered = np.argmax(P[:, :len(cand)], axis=0)
+    else:
+        covered = np.zeros(0, dtype=int)
+
+    rest = np.setdiff1d(np.arange(m), covered)
+    return np.concatenate((cand, n + rest))
+
+
+class CutPool(object):
+    """ the cuts a x <= beta found so far
+
+        a cut in the pool is added to the LP model when it is violated by the
+        LP solution, and its age is the number of rounds since it was last
+        tight (or violated), the cuts that are not in the model are dropped
+        when they are older than max_age
+    """
+
+    def __init__(self, num_vars, max_age=3, min_efficacy=1e-4, max_parallelism=0.999):
+        self.A = np.zeros((0, num_vars))
+        self.b = np.zeros(0)
+        self.age = np.zeros(0, dtype=int)
+        self.in_lp = np.zeros(0, dtype=bool)
+
+        self.max_age = max_age
+        self.min_efficacy = min_efficacy
+        self.max_parallelism = max_parallelism
+
+    def __len__(self):
+        return len(self.b)
+
+    def add(self, A, b):
+        """ add the cuts that are not (nearly) parallel to a cut in the pool
+        """
+        for a, beta in zip(A, b):
+            if self._parallel(a, self.A):
+                continue
+            self.A = np.vstack((self.A, a))
+            self.b = np.append(self.b, beta)
+            self.age = np.append(self.age, 0)
+            self.in_lp = np.append(self.in_lp, False)
+
+    def efficacy(self, x):
+        """ the violation of each cut by x, divided by the norm of the cut
+        """
+        x = np.asarray(x, dtype=float).flatten()
+        return (self.A.dot(x) - self.b) / np.linalg.norm(self.A, axis=1)
+
+    def separate(self, x, max_cuts):
+        """ select up to max_cuts cuts that are not in the model and are
+            violated by x, in order of efficacy, skipping cuts that are
+            nearly parallel to those already selected
+
+            returns the indices of the cuts, which are marked as in the model
+        """
+        efficacy = self.efficacy(x)
+        order = np.argsort(-efficacy)
+
+        selected = []
+        for i in order:
+            if len(selected) >= max_cuts or efficacy[i] < self.min_efficacy:
+                break
+            if self.in_lp[i] or self._parallel(self.A[i], self.A[selected]):
+                continue
+            selected.append(i)
+
+        self.in_lp[selected] = True
+        return selected
+
+    def update(self, x):
+        """ age the cuts that are not tight at x, and drop the old cuts
+            that are not in the model
+        """
+        tight = self.efficacy(x) >= -self.min_efficacy
+        self.age = np.where(tight, 0, self.age + 1)
+
+        keep = self.in_lp | (self.age <= self.max_age)
+        self.A, self.b = self.A[keep], self.b[keep]
+        self.age, self.in_lp = self.age[keep], self.in_lp[keep]
+
+    def active(self):
+        """ the cuts in the model that are not older than max_age
+        """
+        keep = self.in_lp & (self.age <= self.max_age)
+        return self.A[keep], self.b[keep]
+
+    def _parallel(self, a, A):
+        if len(A) == 0:
+            return False
+        cos = np.abs(A.dot(a)) / (np.linalg.norm(A, axis=1) * np.linalg.norm(a))
+        return np.any(cos > self.max_parallelism)
+
+
+def root_cuts(solver, f, A, b, Aeq, beq, lb, ub, num_int,
+              rounds=10, cuts_per_round=10, min_gain=1e-4, pool=None):
+    """ strengthen the LP relaxation of the root problem with rounds of GMI
+        cuts, until no violated cuts are found or a round improves the
+        objective by less than min_gain (relative)
+
+        the cuts are kept in the given CutPool (a new one if None), the cuts
+        that are tight at the last solution are returned and remain marked as
+        in the model
+
+        returns the cuts to keep (A_cut, b_cut), the number of LP solves and
+        the number of LP iterations
+    """
+    lp = get_backend(solver)
+    lp.load(f, A, b, lb, ub, Aeq, beq)
+
+    if pool is None:
+        pool = CutPool(len(f))
+    A_lp, b_lp = A, np.asarray(b, dtype=float).flatten()
+
+    try:
+        x, fun, eflag = lp.solve()
+        solves = 1
+        iterations = lp.iterations
+
+        for r in xrange(rounds):
+            if eflag != 1:
+                break
+
+            A_new, b_new = gmi_cuts(x, A_lp, b_lp, Aeq, beq, lb, ub, num_int,
+                                    basis=lp.get_basic_indices())
+            pool.add(A_new, b_new)
+
+            index = pool.separate(x, cuts_per_round)
+            if len(index) == 0:
+                break
+
+            lp.add_rows(pool.A[index], pool.b[index])
+            A_lp, b_lp = stack_rows(A_lp, b_lp, pool.A[index], pool.b[index])
+
+            x_new, fun_new, eflag = lp.solve()
+            solves += 1
+            iterations += lp.iterations
+
+            if eflag != 1:
+                # the relaxation with the cuts should still be feasible,
+                # do not trust the cuts of this round
+                pool.in_lp[index] = False
+                break
+
+            pool.update(x_new)
+            gain = fun_new - fun
+            x, fun = x_new, fun_new
+            if gain <= min_gain * max(1., abs(fun)):
+                break
+
+        # the cuts that are tight at the last solution are kept in the model,
+        # the others are left in the pool to be separated again in the tree
+        pool.in_lp &= pool.age == 0
+        A_cut, b_cut = pool.A[pool.in_lp], pool.b[pool.in_lp]
+    finally:
+        lp.delete()
+
+    return A_cut, b_cut, solves, iterations
+
+
+def stack_rows(A, b, A_new, b_new):
+    """ append the rows A_new x <= b_new to A x <= b, A may be sparse
+    """
+    b = np.concatenate((np.asarray(b, dtype=float).flatten(), b_new))
+    if issparse(A):
+        return vstack((A, A_new)).tocsr(), b
+    return np.concatenate((np.atleast_2d(A), A_new)), b
+
+
+def standard_form(A, b, Aeq, beq, lb, ub):
+    """ the rows of the problem with a slack for each row,
+        Acom [x, s, s_eq] = bcom (sparse), and the bounds of [x, s, s_eq]
+    """
+    n = len(np.asarray(lb).flatten())
+    A = csr_matrix(A, dtype=float) if np.size(A) > 0 else csr_matrix((0, n))
+    b = np.asarray(b, dtype=float).flatten()
+
+    if Aeq is None or np.size(Aeq) == 0:
+        Aeq = csr_matrix((0, n))
+        beq = np.zeros(0)
+    else:
+        Aeq = csr_matrix(Aeq, dtype=float)
+        beq = np.asarray(beq, dtype=float).flatten()
+
+    m = len(b) + len(beq)
+    Acom = hstack((vstack((A, Aeq)), identity(m))).tocsc()
+    bcom = np.concatenate((b, beq))
+
+    lz = np.concatenate((np.asarray(lb, dtype=float).flatten(), np.zeros(m)))
+    uz = np.concatenate((np.asarray(ub, dtype=float).flatten(),
+                         np.inf * np.ones(len(b)), np.zeros(len(beq))))
+    return Acom, bcom, lz, uz
+
+
+def _clean(a, beta, lb, ub, max_dynamism):
+    """ remove the tiny coefficients of the cut a x <= beta, relaxing beta by
+        their least value within the bounds, None if the cut is numerically
+        unsafe
+    """
+    lb = np.asarray(lb, dtype=float).flatten()
+    ub = np.asarray(ub, dtype=float).flatten()
+
+    big = np.max(np.abs(a))
+    if big == 0 or not np.isfinite(big) or not np.isfinite(beta):
+        return None
+
+    tiny = (a != 0) & (np.abs(a) < big / max_dynamism)
+    low = np.where(a > 0, lb, ub)
+    if np.any(tiny & ~np.isfinite(low)):
+        return None
+
+    beta = beta - a[tiny].dot(low[tiny])
+    a = np.where(tiny, 0., a)
+
+    # scale to a largest coefficient of 1
+    return a / big, beta / big
@@ -13,10 +13,20 @@
 from os.path import dirname, pardir, join
 from scipy.io import loadmat
 
+import copy
+
 import numpy as np
 
+from cache import load_cached
+from chunked import ChunkedArray, is_store, load_store
+from compact import compact
+from routes import RouteIndex
+
 data_path = join(dirname(__file__), pardir, pardir, 'MATLAB', 'Data')
 
+# load the MATLAB files via the memory mapped binary cache (see cache.py)
+use_cache = True
+
 
 class Dataset(object):
     """ convenience wrapper for managing a dataset
@@ -24,30 +34,93 @@ class Dataset(object):
         a dataset consists of four separate data structures:
             Inputs, Outputs, Constants, Constraints
 
+        each structure is loaded on first access and, when read from the
+        binary cache, each of its tables is mapped on first access. call
+        prefetch() to load everything up front.
+
+        file_name may also be a chunked store (see chunked.py), from which
+        filtering reads only the selected routes.
+
         the dataset can be filtered to include selected aircraft and routes
     """
+
+    structs = ['Inputs', 'Outputs', 'Constants', 'Coefficients']
+
     def __init__(self, file_name=None, suffix=None):
+        # maps each (lower case) struct name to the file it is loaded from
+        self._sources = {}
+
         if file_name is not None:
-            mat = load_data(file_name)
-            self.inputs       = mat['Inputs']
-            self.outputs      = mat['Outputs']
-            self.constants    = mat['Constants']
-            self.coefficients = mat['Coefficients']
+            for key in self.structs:
+                self._sources[key.lower()] = (file_name, key)
         elif suffix is not None:
             # loads data from four files with the naming convention:
             # "key_suffix.mat", where key is the lower case name of
             # one of the four structs and suffix is arbitrary
-            for key in ['Inputs', 'Outputs', 'Constants', 'Coefficients']:
+            for key in self.structs:
                 file_name = key.lower() + '_'+suffix+'.mat'
-                mat = load_data(file_name)
-                setattr(self, key.lower(), mat[key])
+                self._sources[key.lower()] = (file_name, key)
         else:
             self.inputs = None
             self.outputs = None
             self.constants = None
             self.coefficients = None
 
-    def filter(self, ac_ind=[], ac_num=[], distance=[], dvector=[], add_trip=0):
+    def __getattr__(self, name):
+        # only called for structs that have not been loaded yet
+        sources = self.__dict__.get('_sources', {})
+        if name in sources:
+            file_name, key = sources[name]
+            struct = load_data(file_name, variable_names=[key])[key]
+            setattr(self, name, struct)
+            return struct
+        raise AttributeError(name)
+
+    def prefetch(self):
+        """ load all structs and map all of their tables now,
+            rather than on first access
+        """
+        for key in self.structs:
+            struct = getattr(self, key.lower())
+            for field in getattr(struct, '_fieldnames', []):
+                getattr(struct, field)
+        return self
+
+    def copy(self):
+        """ return a shallow copy of the dataset that shares its arrays,
+            so that the copy can be filtered without modifying this dataset
+        """
+        data = Dataset()
+        data._sources = self._sources
+        if '_route_index' in self.__dict__:
+            data._route_index = self._route_index
+        for key in self.structs:
+            name = key.lower()
+            if name in self.__dict__:
+                setattr(data, name, copy.copy(self.__dict__[name]))
+            else:
+                del data.__dict__[name]
+        return data
+
+    def compact(self):
+        """ returns a CompactDataset holding only the fields used by the
+            optimization, as contiguous float64 arrays (see compact.py)
+        """
+        return compact(self)
+
+    @property
+    def route_index(self):
+        """ the index over the route distances and demand in inputs.RVector
+            and inputs.DVector, built on first use and rebuilt if either is
+            replaced
+        """
+        index = self.__dict__.get('_route_index')
+        if index is None or index.RVector is not self.inputs.RVector \
+                         or index.DVector is not self.inputs.DVector:
+            index = self._route_index = RouteIndex(self.inputs.RVector, self.inputs.DVector)
+        return index
+
+    def filter(self, ac_ind=[], ac_num=[], distance=[], dvector=[], add_trip=0, route_ind=None):
         """ filters the dataset to include only the specified aircraft and routes
 
             arguments:
@@ -55,84 +128,247 @@ class Dataset(object):
                 ac_num          the number of each aircraft
                 distance        the route distances to select
                 dvector         the route demand
+                route_ind       the indices of the routes to select (e.g. from
+                                a route_index query), instead of distance
+
+            (see filtered() to select data without modifying the dataset)
+        """
+        scenario = self.filtered(ac_ind, ac_num, distance, dvector, add_trip, route_ind)
+
+        # evaluate everything before modifying the structs it is derived from
+        changes = [(getattr(self, key.lower()), getattr(scenario, key.lower())._changes())
+                   for key in self.structs]
+
+        for struct, fields in changes:
+            for field, value in fields.iteritems():
+                setattr(struct, field, value)
+
+    def filtered(self, ac_ind=[], ac_num=[], distance=[], dvector=[], add_trip=0, route_ind=None,
+                 fuel_cost=0.2431, turn_around=1):
+        """ returns a FilteredDataset that includes only the specified aircraft
+            and routes, leaving this dataset unchanged
+
+            arguments are as for filter(), plus the scenario fuel cost and
+            turn around time
+        """
+        if route_ind is None:
+            route_ind = self.route_index.nearest(distance)
+
+        return FilteredDataset(self, ac_ind, route_ind, ac_num, dvector,
+                               add_trip=add_trip, fuel_cost=fuel_cost, turn_around=turn_around)
+
+
+class FilteredDataset(object):
+    """ a scenario derived from a base dataset, which is left unchanged
+
+        the scenario holds the indices of the selected aircraft and routes and
+        the scenario overrides (ACNum, DVector, FuelCost, TurnAround). it has
+        the same four structs as the base dataset, which refer to the base
+        arrays for anything that is not filtered; the aircraft/route tables
+        are gathered from the base tables on first access. MaxTrip (and the
+        trips per aircraft it is based on) is computed on first access and
+        cached on the scenario.
+    """
+
+    overrides = ['ac_num', 'dvector', 'add_trip', 'fuel_cost', 'turn_around']
+
+    def __init__(self, base, ac_ind, route_ind, ac_num, dvector,
+                 add_trip=0, fuel_cost=0.2431, turn_around=1):
+        self.base        = base
+        self.ac_ind      = np.asarray(ac_ind, dtype=int)
+        self.route_ind   = np.asarray(route_ind, dtype=int)
+        self.ac_num      = np.array(ac_num)
+        self.dvector     = dvector
+        self.add_trip    = add_trip
+        self.fuel_cost   = fuel_cost
+        self.turn_around = turn_around
+
+        self.outputs = FilteredStruct(base.outputs, self.ac_ind, self.route_ind,
+                                      ['TicketPrice'])
+
+        self.coefficients = FilteredStruct(base.coefficients, self.ac_ind, self.route_ind,
+                                           ['Fuelburn', 'Doc', 'Nox', 'BlockTime'])
+
+        self._trips = None
+
+        self._apply_overrides()
+
+    def _apply_overrides(self):
+        base = self.base
+
+        K = len(self.ac_ind)      # number of aircraft types
+        J = len(self.route_ind)   # number of routes
+
+        # MaxTrip is computed on first access
+        self.inputs = FilteredStruct(base.inputs, self.ac_ind, self.route_ind, [],
+            {'MaxTrip': self._max_trip},
+            RVector    = base.inputs.RVector[self.route_ind],
+            DVector    = self.dvector,
+            AvailPax   = base.inputs.AvailPax[self.ac_ind],
+            ACNum      = self.ac_num,
+            TurnAround = self.turn_around,
+            Lim        = np.ones((K, J)))
+
+        self.constants = FilteredStruct(base.constants, self.ac_ind, self.route_ind, [], {},
+            Runway   = 1e4 * J,
+            MH       = base.constants.MH[self.ac_ind],
+            FuelCost = self.fuel_cost,
+            demfac   = 1)
+
+    @property
+    def trips_per_aircraft(self):
+        """ the number of trips a single aircraft of each type can make on
+            each route (K x J), computed on first use
         """
-        route_ind = range_extract(self.inputs.RVector, distance)
+        if self._trips is None:
+            self._trips = aircraft_trips(self.coefficients.BlockTime,
+                                         self.constants.MH, self.turn_around)
+        return self._trips
 
-        self.inputs.RVector    = self.inputs.RVector[route_ind]
-        self.inputs.DVector    = dvector
-        self.inputs.AvailPax   = self.inputs.AvailPax[ac_ind]
-        self.inputs.ACNum      = np.array(ac_num)
-        self.inputs.TurnAround = 1
+    def _max_trip(self):
+        return (self.ac_num.reshape(-1, 1) * self.trips_per_aircraft + self.add_trip).flatten()
 
-        K = len(self.inputs.AvailPax)        # number of aircraft types
-        J = len(self.inputs.DVector[:, 1])   # number of routes
-        self.inputs.Lim = np.ones((K, J))
+    def compact(self):
+        """ returns a CompactDataset holding only the fields used by the
+            optimization, as contiguous float64 arrays (see compact.py)
+        """
+        return compact(self)
 
-        self.constants.Runway   = 1e4 * len(self.inputs.RVector)
-        self.constants.MH       = self.constants.MH[ac_ind]
-        self.constants.FuelCost = 0.2431
-        self.constants.demfac   = 1
+    def replace(self, **overrides):
+        """ returns a scenario for the same aircraft and routes with different
+            overrides (any of ac_num, dvector, add_trip, fuel_cost, turn_around)
 
-        self.outputs.TicketPrice    = filter_data(self.outputs.TicketPrice,    ac_ind, route_ind)
+            the filtered tables are shared with this scenario
+        """
+        scenario = copy.copy(self)
+        for name, value in overrides.iteritems():
+            if name not in self.overrides:
+                raise TypeError("'%s' is not a scenario override" % name)
+            setattr(scenario, name, value)
+        if 'turn_around' in overrides:
+            scenario._trips = None
+        scenario._apply_overrides()
+        return scenario
+
+
+class FilteredStruct(object):
+    """ a view of one of the structs of a base dataset
+
+        the named aircraft/route tables are filtered from the base struct on
+        first access, derived fields are computed (by the given functions) on
+        first access, fields given as keyword arguments override those of the
+        base struct and all other fields are those of the base struct
+    """
 
-        self.coefficients.Fuelburn  = filter_data(self.coefficients.Fuelburn,  ac_ind, route_ind)
-        self.coefficients.Doc       = filter_data(self.coefficients.Doc,       ac_ind, route_ind)
-        self.coefficients.Nox       = filter_data(self.coefficients.Nox,       ac_ind, route_ind)
-        self.coefficients.BlockTime = filter_data(self.coefficients.BlockTime, ac_ind, route_ind)
+    def __init__(self, base, ac_ind, route_ind, tables, derived=None, **fields):
+        self._base      = base
+        self._ac_ind    = ac_ind
+        self._route_ind = route_ind
+        self._tables    = tables
+        self._derived   = derived or {}
+        self.__dict__.update(fields)
+
+    def __getattr__(self, name):
+        attrs = self.__dict__
+        if name.startswith('__') or '_base' not in attrs:
+            raise AttributeError(name)
+        if name in attrs['_tables']:
+            value = filter_data(getattr(attrs['_base'], name), attrs['_ac_ind'], attrs['_route_ind'])
+            setattr(self, name, value)
+            return value
+        if name in attrs['_derived']:
+            value = attrs['_derived'][name]()
+            setattr(self, name, value)
+            return value
+        return getattr(attrs['_base'], name)
+
+    def _changes(self):
+        """ returns the fields that differ from the base struct
+        """
+        fields = dict((name, getattr(self, name)) for name in self._tables)
+        fields.update((name, getattr(self, name)) for name in self._derived)
+        fields.update((name, value) for name, value in self.__dict__.iteritems()
+                      if not name.startswith('_'))
+        return fields
 
-        rw = 0
-        max_trip = np.zeros(K*J)
-        for kk in range(K):
-            for jj in range(J):
-                max_trip[rw] = self.inputs.ACNum[kk] \
-                             * np.ceil(12./(self.coefficients.BlockTime[kk, jj] * (1 + self.constants.MH[kk]) + self.inputs.TurnAround)) \
-                             + add_trip
-                rw = rw + 1
 
-        self.inputs.MaxTrip = max_trip
+def aircraft_trips(block_time, MH, turn_around):
+    """ the number of trips a single aircraft of each type can make
+        on each route (in 12 hours)
+    """
+    return np.ceil(12./(block_time * (1 + np.reshape(MH, (-1, 1))) + turn_around))
 
 
-def load_data(file_name):
+def load_data(file_name, cache=None, variable_names=None):
     """ load MATLAB dataset
+
+        unless disabled (by argument or by the module level use_cache flag)
+        the data is read from the binary cache, in which case the numeric
+        struct fields are read-only memory mapped arrays
+
+        if variable_names is given, only those variables are loaded
+
+        file_name may also be a chunked store (see chunked.py)
     """
-    return loadmat(join(data_path, file_name),
+    if is_store(join(data_path, file_name)):
+        return load_store(join(data_path, file_name), variable_names)
+
+    if cache is None:
+        cache = use_cache
+
+    if cache:
+        return load_cached(join(data_path, file_name), variable_names)
+
+    return loadmat(join(data_path, file_name), variable_names=variable_names,
                    squeeze_me=True, struct_as_record=False)
 
 
 def range_extract(RVector, distance):
     """ find the closest match in RVector for each value in distance
         returns an index into RVector for each value in distance
-    """
-    indices = np.zeros(len(distance))
-
-    for cc in xrange(len(distance)):
-        dist = distance[cc]
-        diff_min = np.inf
-
-        for r_id, r_dist in np.ndenumerate(RVector):
-            diff = np.abs(r_dist - dist)
-            if diff < diff_min:
-                indices[cc] = r_id[0]
-                diff_min = diff
 
-    return indices.astype(int)
+        (to look up many sets of distances, use a RouteIndex directly)
+    """
+    return RouteIndex(RVector).nearest(distance)
 
 
 def filter_data(data, ac_ind, route_ind):
     """ filter a 2-dimensional array of aircraft/route data to include
         only the specified aircraft and routes
+
+        if both selections are contiguous ascending ranges, a read-only view
+        into data is returned, otherwise the selection is gathered into a copy
+
+        if data is a ChunkedArray only the blocks containing the selected
+        routes are read
     """
-    filtered_data = np.array([])
+    if isinstance(data, ChunkedArray):
+        return data.take(ac_ind, route_ind)
 
-    for kk in xrange(len(ac_ind)):
-        tmp = np.array([])
+    rows = _as_slice(ac_ind, data.shape[0])
+    cols = _as_slice(route_ind, data.shape[1])
 
-        for jj in xrange(len(route_ind)):
-            tmp = np.append(tmp, data[ac_ind[kk], route_ind[jj]])
+    if rows is not None and cols is not None:
+        view = data[rows, cols]
+        view.flags.writeable = False
+        return view
 
-        filtered_data = np.append(filtered_data, tmp)
+    ac_ind    = np.asarray(ac_ind,    dtype=int).ravel()
+    route_ind = np.asarray(route_ind, dtype=int).ravel()
+    return np.asarray(data)[np.ix_(ac_ind, route_ind)]
 
-    return filtered_data.reshape(len(ac_ind), -1)
+
+def _as_slice(ind, size):
+    """ return the equivalent slice if ind is a contiguous ascending range
+        of indices into an axis of the given size, otherwise None (so that
+        indices out of range still raise IndexError)
+    """
+    ind = np.asarray(ind, dtype=int).ravel()
+    if len(ind) == 0 or ind[0] < 0 or ind[-1] >= size:
+        return None
+    if np.array_equal(ind, np.arange(ind[0], ind[0] + len(ind))):
+        return slice(ind[0], ind[0] + len(ind))
+    return None
 
 
 if __name__ == "__main__":
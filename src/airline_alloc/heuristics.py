@@ -0,0 +1,244 @@
+"""
+    heuristics.py
+
+    primal heuristics for branch_cut, to find integer solutions (incumbents)
+    early in the search, so that nodes can be pruned by bound
+
+    a heuristic is a function  heuristic(heur, x, bounds)  that is given the
+    LP solution x of a node and the bounds of the node (see Node.bounds), and
+    returns an integer solution or None. it can solve LPs over the node with
+    heur.solve(bounds). the available heuristics are:
+        rounding        round the integer variables to the nearest integer,
+                        rounding up only where the rows with only integer
+                        variables (e.g. the utilization of the fleet, A3)
+                        allow it, and solve for the continuous variables
+        diving          repeatedly round the least fractional integer
+                        variable and solve again, until the solution is
+                        integer (or infeasible)
+        fix-and-resolve fix the integer variables at their rounding and solve
+                        for the continuous variables, then move each integer
+                        variable by one and solve again, keeping the moves
+                        that improve the objective
+
+    other heuristics can be added to the heuristics dict, or passed to
+    branch_cut as functions.
+"""
+
+import numpy as np
+
+from scipy.sparse import csc_matrix
+
+
+class Heuristics(object):
+    """ runs primal heuristics on the nodes of a tree, with the LP model of
+        a NodeSolver (see nodes.py)
+    """
+
+    def __init__(self, names, node_solver, f, A, b, num_int, frequency=10):
+        """ names are the names of heuristics in the heuristics dict,
+            or heuristic functions
+        """
+        self.heuristics = []
+        for name in names:
+            if isinstance(name, basestring):
+                if name not in heuristics:
+                    raise ValueError("unknown heuristic '%s', the available heuristics are: %s"
+                                     % (name, ', '.join(sorted(heuristics))))
+                self.heuristics.append((name, heuristics[name]))
+            else:
+                self.heuristics.append((name.__name__, name))
+        self.node_solver = node_solver
+        self.frequency = frequency
+
+        self.f = np.asarray(f, dtype=float).flatten()
+        self.b = np.asarray(b, dtype=float).flatten()
+        self.num_int = num_int
+
+        # the rows with only integer variables
+        A = csc_matrix(A, dtype=float)
+        int_rows = np.ones(A.shape[0], dtype=bool)
+        int_rows[A[:, num_int:].tocoo().row] = False
+        self.A_int = A[np.flatnonzero(int_rows), :num_int].toarray()
+        self.b_int = self.b[int_rows]
+
+        self.solves = 0
+        self.iterations = 0
+
+        # the optimal basis of the last solve, each solve is warm started
+        # from it
+        self.basis = None
+
+    def __len__(self):
+        return len(self.heuristics)
+
+    def due(self, iteration):
+        """ True if the heuristics are to be run at the given iteration,
+            the root (1) and every frequency iterations after it
+        """
+        return len(self.heuristics) > 0 and (iteration == 1 or
+                                             (self.frequency > 0 and iteration % self.frequency == 0))
+
+    def run(self, x, bounds, U_best=np.inf):
+        """ run the heuristics on a node with LP solution x and the given
+            bounds, returns the name of the heuristic, the solution and its
+            objective value for the best solution better than U_best found,
+            or None
+        """
+        best = None
+        for name, heuristic in self.heuristics:
+            x_h = heuristic(self, np.array(x, dtype=float), dict(bounds))
+            if x_h is not None:
+                f_h = self.f.dot(x_h)
+                if f_h < U_best and (np.isinf(U_best) or U_best - f_h > 1e-9 * max(1., abs(U_best))):
+                    best = (name, x_h, f_h)
+                    U_best = f_h
+        return best
+
+    def solve(self, bounds):
+        """ solve the LP with the given bounds
+        """
+        x, fun, eflag, iterations, self.basis = self.node_solver.solve(bounds, self.basis)
+        self.solves += 1
+        self.iterations += iterations
+        return x, fun, eflag
+
+    def bounds(self, bounds, var):
+        """ the bounds of var in the node
+        """
+        lb, ub = self.node_solver.bounds.root_lb, self.node_solver.bounds.root_ub
+        return bounds.get(var, (lb[var], ub[var]))
+
+    def fractional(self, x):
+        """ the integer variables that are fractional in x
+        """
+        x_int = x[:self.num_int]
+        return np.abs(x_int - np.round(x_int)) > 1e-06
+
+    def integer(self, x):
+        """ x with its integer variables rounded, if they are all integer
+            (within tolerance), otherwise None
+        """
+        if np.any(self.fractional(x)):
+            return None
+        x = x.copy()
+        x[:self.num_int] = np.round(x[:self.num_int])
+        return x
+
+    def fix(self, x_int, bounds):
+        """ fix the integer variables at x_int and solve for the continuous
+            variables, returns the solution or None if it is infeasible
+        """
+        bounds = dict(bounds)
+        for var, value in enumerate(x_int):
+            bounds[var] = (value, value)
+
+        x, fun, eflag = self.solve(bounds)
+        if eflag != 1:
+            return None
+        return self.integer(x)
+
+
+def rounding(heur, x, bounds):
+    """ round the integer variables of x to the nearest integer, rounding up
+        only where the rows with only integer variables allow it, then solve
+        for the continuous variables
+    """
+    x_int = _round(heur, x, bounds)
+    if x_int is None:
+        return None
+    return heur.fix(x_int, bounds)
+
+
+def diving(heur, x, bounds):
+    """ round the least fractional integer variable of x to the nearest
+        integer and solve again, trying the other direction if that is
+        infeasible, until the solution is integer
+    """
+    for depth in xrange(heur.num_int):
+        frac = heur.fractional(x)
+        if not np.any(frac):
+            return heur.integer(x)
+
+        x_int = x[:heur.num_int]
+        distance = np.where(frac, np.abs(x_int - np.round(x_int)), np.inf)
+        var = np.argmin(distance)
+        lb, ub = heur.bounds(bounds, var)
+
+        down = (lb, np.floor(x_int[var]))
+        up   = (np.ceil(x_int[var]), ub)
+        for change in ((down, up) if x_int[var] - np.floor(x_int[var]) < 0.5 else (up, down)):
+            bounds[var] = change
+            x_new, fun, eflag = heur.solve(bounds)
+            if eflag == 1:
+                break
+        else:
+            return None
+
+        x = x_new
+
+    return heur.integer(x)
+
+
+def fix_and_resolve(heur, x, bounds):
+    """ fix the integer variables at the rounding of x and solve for the
+        continuous variables, then move each integer variable up or down by
+        one, keeping the moves that improve the objective
+    """
+    x_int = _round(heur, x, bounds)
+    if x_int is None:
+        return None
+
+    x_best = heur.fix(x_int, bounds)
+    if x_best is None:
+        return None
+    f_best = heur.f.dot(x_best)
+
+    slack = heur.b_int - heur.A_int.dot(x_int)
+    for var in xrange(heur.num_int):
+        lb, ub = heur.bounds(bounds, var)
+        column = heur.A_int[:, var]
+        for step in 1, -1:
+            if not lb <= x_int[var] + step <= ub or np.any(step * column > slack + 1e-09):
+                continue
+
+            x_int[var] += step
+            x_new = heur.fix(x_int, bounds)
+            if x_new is not None and heur.f.dot(x_new) < f_best:
+                x_best, f_best = x_new, heur.f.dot(x_new)
+                slack -= step * column
+                break
+            x_int[var] -= step
+
+    return x_best
+
+
+def _round(heur, x, bounds):
+    """ the integer variables of x rounded to the nearest integer, rounding
+        up (in order of the fractional parts) only while the rows with only
+        integer variables allow it, None if those rows are violated
+    """
+    num_int = heur.num_int
+    lb, ub = zip(*[heur.bounds(bounds, var) for var in xrange(num_int)])
+
+    x_int = np.clip(np.floor(x[:num_int] + 1e-06), lb, ub)
+    slack = heur.b_int - heur.A_int.dot(x_int)
+
+    frac = x[:num_int] - x_int
+    for var in np.argsort(-frac):
+        if frac[var] < 0.5:
+            break
+        column = heur.A_int[:, var]
+        if x_int[var] + 1 <= ub[var] and np.all(column <= slack + 1e-09):
+            x_int[var] += 1
+            slack -= column
+
+    if np.any(slack < -1e-09):
+        return None
+    return x_int
+
+
+heuristics = {
+    'rounding':        rounding,
+    'diving':          diving,
+    'fix-and-resolve': fix_and_resolve,
+}
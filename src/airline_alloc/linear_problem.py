@@ -3,13 +3,16 @@ An Airline Allocation sub-problem is used to demonstrate usage of
 a linear program solver as an OpenMDAO component.
 """
 
+from os.path import getmtime, join
+
 from openmdao.main.api import Component, Assembly, set_as_top
 from openmdao.main.datatypes.api import Array, Str
 
 import numpy as np
 
 from dataset import *
-from optimization import get_objective, get_constraints
+from registry import get_dataset
+from optimization import get_objective, get_constraints, Formulation
 
 from linear_program import LinProg, LPSolve
 
@@ -61,38 +64,45 @@ class AirlineAllocationProblem(Component):
             desc='indices in the A matrix correspoding to the constraints containing integer and continuous (if any) type design variables')
 
     def execute(self):
-        # read and select the data
-        data = Dataset(self.filename)
-        data.filter(self.ac_ind, self.ac_num, self.distance, self.dvector)
-
-        # linear objective coefficients
-        objective = self.get_objective(data)
-        f_int = objective[0]                # integer type design variables
-        f_con = objective[1]                # continuous type design variables
-        self.f = np.concatenate((f_int, f_con))
+        # reuse the formulation if only the demand and/or fleet size changed,
+        # and the data file has not been modified since
+        key = (self.filename, getmtime(join(data_path, self.filename)),
+               tuple(np.asarray(self.ac_ind).flat), tuple(np.asarray(self.distance).flat))
+        formulation = self.__dict__.get('_formulation')
+
+        if formulation is not None and self._formulation_key == key \
+           and len(self.dvector) == formulation.J:
+            formulation.update(dvector=self.dvector, ac_num=self.ac_num)
+        else:
+            # select the data from the shared network dataset, keeping only
+            # the filtered arrays rather than a view of the whole network
+            data = get_dataset(self.filename).filtered(self.ac_ind, self.ac_num, self.distance, self.dvector)
+            data = data.compact()
+            formulation = Formulation(data, objective=self.get_objective,
+                                      constraints=self.get_constraints)
+            self._formulation = formulation
+            self._formulation_key = key
+
+        J = formulation.J    # number of routes
+
+        # linear objective coefficients for the integer and continuous type design variables
+        self.f = formulation.f.copy()
 
         # coefficient matrix for linear inequality constraints, Ax <= b
-        constraints = self.get_constraints(data)
-        self.A = constraints[0]
-        self.b = constraints[1]
+        self.A = formulation.A.copy()
+        self.b = formulation.b.copy()
 
         # coefficient matrix for linear equality constraints, Aeqx <= beq (N/A)
         self.Aeq = np.ndarray(shape=(0, 0))
         self.beq = np.ndarray(shape=(0, 0))
 
-        J = data.inputs.DVector.shape[0]    # number of routes
-        K = len(data.inputs.AvailPax)       # number of aircraft types
-
         # lower and upper bounds
-        self.lb = np.zeros((2*K*J, 1))
-        self.ub = np.concatenate((
-            np.ones((K*J, 1)) * data.inputs.MaxTrip.reshape(-1, 1),
-            np.ones((K*J, 1)) * np.inf
-        ))
+        self.lb = formulation.lb.copy()
+        self.ub = formulation.ub.copy()
 
         # indices into A matrix for continuous & mixed integer/continuous variables
         self.ind_conCon = range(2*J)
-        self.ind_intCon = range(2*J, len(constraints[0])+1)
+        self.ind_intCon = range(2*J, formulation.A.shape[0]+1)
 
     def get_objective(self, data):
         """ generate the objective matrix for linprog
@@ -2,6 +2,7 @@
 This file demonstrates the wrapping of a linear program solver as an OpenMDAO component.
 
 Two different solvers are implemented: numpy.optimize.linprog and lpsolve
+(via the LP solver backends in backends.py, any of which may be selected)
 
 As of this writing, there is a bug in linprog that results in an incorrect solution
 for some cases. This has been reported and should be fixed in due course.
@@ -15,23 +16,11 @@ In the meantime it is recommended to download and install linprog from:
 """
 
 from openmdao.main.api import Component
-from openmdao.main.datatypes.api import Array, Float, Bool, Int
+from openmdao.main.datatypes.api import Array, Float, Bool, Int, Str
 
 from zope.interface import Interface, Attribute, implements
 
-import numpy as np
-
-try:
-    from scipy.optimize import linprog
-except ImportError, e:
-    print "SciPy version >= 0.15.0 is required for linprog support!!"
-    pass
-
-try:
-    from lpsolve55 import *
-except ImportError:
-    print 'lpsolve is not available'
-    pass
+from backends import get_backend
 
 
 class ILinearProgram(Interface):
@@ -63,6 +52,22 @@ class ILinearProgram(Interface):
         """ solve the linear program """
 
 
+def solve(comp):
+    """ solve the linear program defined by the inputs of a component
+        with the backend named by its solver input
+        returns the solution, the function value and the exit flag
+    """
+    lp = get_backend(comp.solver)
+    try:
+        lp.load(comp.f, comp.A, comp.b, comp.lb, comp.ub, comp.A_eq, comp.b_eq)
+        x, fun, eflag = lp.solve()
+    finally:
+        lp.delete()
+
+    print comp.get_pathname(), 'results:\n---------------\n', eflag, '\n---------------'
+    return x, fun, eflag
+
+
 class LinProg(Component):
     """ A simple component wrapper for scipy.optimize.linprog
     """
@@ -90,6 +95,9 @@ class LinProg(Component):
     ub    = Array(iotype='in',
             desc='upper bounds for each independent variable in the solution')
 
+    solver = Str('linprog', iotype='in',
+             desc='the name of the LP solver backend (see backends.py)')
+
     # outputs
     x     = Array(iotype='out',
             desc='independent variable vector which optimizes the linear programming problem')
@@ -106,17 +114,14 @@ class LinProg(Component):
     def execute(self):
         """ solve the linear program """
 
-        results = linprog(self.f,
-                          A_eq=self.A_eq,   b_eq=self.b_eq,
-                          A_ub=self.A,      b_ub=self.b,
-                          bounds=zip(self.lb, self.ub),
-                          options={ 'maxiter': 100, 'disp': True })
+        x, fun, eflag = solve(self)
+
+        self.x   = x
+        self.fun = fun
+        self.success = eflag == 1
 
-        print self.get_pathname(), 'results:\n---------------\n', results, '\n---------------'
-        self.x   = results.x
-        self.fun = results.fun
-        self.success = results.success
-        self.status  = results.status
+        # translate the exit flag to the linprog status
+        self.status = {1: 0, 0: 1, -2: 2, -3: 3}.get(eflag, 4)
 
 
 class LPSolve(Component):
@@ -146,6 +151,9 @@ class LPSolve(Component):
     ub    = Array(iotype='in',
             desc='upper bounds for each independent variable in the solution')
 
+    solver = Str('lpsolve', iotype='in',
+             desc='the name of the LP solver backend (see backends.py)')
+
     # outputs
     x     = Array(iotype='out',
             desc='independent variable vector which optimizes the linear programming problem')
@@ -162,33 +170,9 @@ class LPSolve(Component):
     def execute(self):
         """ solve the linear program """
 
-        obj = self.f.tolist()
-        lp = lpsolve('make_lp', 0, len(obj))
-        lpsolve('set_verbose', lp, 'IMPORTANT')
-        lpsolve('set_obj_fn', lp, obj)
-
-        i = 0
-        for con in self.A:
-            lpsolve('add_constraint', lp, con.tolist(), 'LE', self.b[i])
-            i = i+1
-
-        for i in range (len(self.lb)):
-            lpsolve('set_lowbo', lp, i+1,  self.lb[i])
-            lpsolve('set_upbo',  lp, i+1, self.ub[i])
-
-        results = lpsolve('solve', lp)
-
-        print self.get_pathname(), 'results:\n---------------\n', results, '\n---------------'
-        self.x   = np.array(lpsolve('get_variables', lp)[0])
-        print 'fun:', lpsolve('get_objective', lp)
-        self.fun = lpsolve('get_objective', lp)
-        self.success = True if results == 0 else False
-        if results == 0:            # optimized
-            self.status = 1
-        elif results == 2:          # infeasible
-            self.status = -2
-        elif results == 3:          # unbounded
-            self.status = -3
-        else:
-            self.status = -1
-        lpsolve('delete_lp', lp)
+        x, fun, eflag = solve(self)
+
+        self.x   = x
+        self.fun = fun
+        self.success = eflag == 1
+        self.status  = eflag
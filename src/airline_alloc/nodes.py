@@ -0,0 +1,264 @@
+"""
+    nodes.py
+
+    the queue of open branch and bound nodes for branch_cut
+
+    the open nodes are kept in a heap, ordered by the node selection rule:
+        max-bound       the node whose parent has the highest objective value
+                        (the original rule of branch_cut.m)
+        best-bound      the node whose parent has the lowest objective value
+        depth-first     the deepest node
+        best-estimate   the node with the lowest estimated objective value of
+                        an integer solution, based on pseudocosts
+
+    ties are broken in favor of the most recently added node.
+
+    when a better integer solution is found, the nodes whose inherited bound
+    (the objective value of their parent) is not better are removed from the
+    queue (see NodeQueue.prune), without being solved.
+
+    a node is stored as its parent and its bound changes, which are applied
+    to the LP model of the root problem to solve it (see ModelBounds), so a
+    node takes a few bytes rather than a copy of the problem.
+
+    nodes are solved by a NodeSolver, which holds the LP model, either in the
+    process running the tree or in each of a pool of worker processes.
+"""
+
+import heapq
+
+import numpy as np
+
+from backends import get_backend
+
+
+rules = {
+    'max-bound':     lambda node: -node.b_F,
+    'best-bound':    lambda node: node.b_F,
+    'depth-first':   lambda node: -node.depth,
+    'best-estimate': lambda node: node.estimate,
+}
+
+
+class NodeQueue(object):
+    """ the open nodes, popped in the order given by the selection rule
+    """
+
+    def __init__(self, rule='max-bound'):
+        if rule not in rules:
+            raise ValueError("unknown node selection rule '%s', the available rules are: %s"
+                             % (rule, ', '.join(sorted(rules))))
+        self.rule = rule
+        self._key = rules[rule]
+        self._heap = []
+        self._count = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, node):
+        self._count += 1
+        heapq.heappush(self._heap, (self._key(node), -self._count, node))
+
+    def pop(self):
+        return heapq.heappop(self._heap)[-1]
+
+    def prune(self, U_best):
+        """ remove the nodes whose inherited bound is not better than the
+            objective value of the incumbent U_best, returns their number
+        """
+        size = len(self._heap)
+        self._heap = [entry for entry in self._heap if entry[-1].bound < U_best]
+        heapq.heapify(self._heap)
+        return size - len(self._heap)
+
+
+class Pseudocosts(object):
+    """ the average increase of the objective per unit change of each integer
+        variable, when branching down (0) and up (1)
+    """
+
+    def __init__(self, num_int):
+        self.total = np.zeros((2, num_int))
+        self.count = np.zeros((2, num_int))
+
+    def update(self, var, direction, change, increase):
+        """ record the objective increase of a child node, for a change in
+            the branching variable (its distance to the new bound)
+        """
+        if change > 1e-06 and np.isfinite(increase):
+            self.total[direction, var] += max(increase, 0.) / change
+            self.count[direction, var] += 1
+
+    def costs(self):
+        """ the down and up pseudocosts, the variables that have not been
+            branched on yet get the average of those that have (or 1)
+        """
+        costs = np.ones(self.total.shape)
+        for direction in 0, 1:
+            known = self.count[direction] > 0
+            if np.any(known):
+                cost = self.total[direction, known] / self.count[direction, known]
+                costs[direction] = np.mean(cost)
+                costs[direction, known] = cost
+        return costs
+
+    def estimates(self, bound, x_int, var):
+        """ the estimated objective values of an integer solution in the down
+            and up children of a node with objective value bound and integer
+            solution x_int, branched on var
+        """
+        frac = x_int - np.floor(x_int)
+        down, up = self.costs()
+
+        per_var = np.minimum(down * frac, up * (1 - frac))
+        per_var[(frac <= 1e-06) | (frac >= 1 - 1e-06)] = 0
+        rest = bound + np.sum(per_var) - per_var[var]
+
+        return rest + down[var] * frac[var], rest + up[var] * (1 - frac[var])
+
+
+class Node(object):
+    """ a branch and bound node, stored as its parent and the bound changes
+        (variable, lb, ub) that it makes to the parent problem
+
+        bound is the objective value of its parent, a lower bound on its own
+        that it inherits, and b_F is the objective value of the node once it
+        has been solved (before then its bound)
+    """
+
+    __slots__ = ('parent', 'changes', 'bound', 'b_F', 'depth', 'estimate', 'branch', 'basis', 'node', 'tree')
+
+    def __init__(self, parent=None, changes=(), b_F=-np.inf, estimate=-np.inf,
+                 branch=None, basis=None, node=1, tree=1):
+        self.parent   = parent
+        self.changes  = changes
+        self.bound    = b_F
+        self.b_F      = b_F
+        self.depth    = parent.depth + 1 if parent is not None else 0
+        self.estimate = estimate
+        self.branch   = branch
+        self.basis    = basis
+        self.node     = node
+        self.tree     = tree
+
+    def bounds(self):
+        """ the bounds that differ from the root problem, as a dict of
+            variable: (lb, ub), the latest change of each variable applies
+        """
+        bounds = {}
+        node = self
+        while node is not None:
+            for var, lb, ub in node.changes:
+                bounds.setdefault(var, (lb, ub))
+            node = node.parent
+        return bounds
+
+
+class ModelBounds(object):
+    """ the bounds of the LP model shared by the nodes of a tree: the bounds
+        of the root problem, changed by those of the last node solved
+    """
+
+    def __init__(self, lb, ub):
+        self.root_lb = np.array(lb, dtype=float).flatten()
+        self.root_ub = np.array(ub, dtype=float).flatten()
+        self.lb = self.root_lb.copy()
+        self.ub = self.root_ub.copy()
+        self.changed = set()
+
+    def apply(self, node, lp):
+        """ set the bounds of the model to those of the node, changing only
+            the bounds that differ from those of the last node
+        """
+        self.set(node.bounds(), lp)
+
+    def set(self, bounds, lp):
+        """ set the bounds of the model to the root bounds changed by the
+            given bounds (see Node.bounds)
+        """
+        bounds = dict(bounds)
+
+        for var in self.changed.difference(bounds):
+            bounds[var] = (self.root_lb[var], self.root_ub[var])
+
+        index = [var for var, (lb, ub) in bounds.iteritems()
+                 if lb != self.lb[var] or ub != self.ub[var]]
+        if len(index) > 0:
+            index = np.array(sorted(index))
+            self.lb[index] = [bounds[var][0] for var in index]
+            self.ub[index] = [bounds[var][1] for var in index]
+            lp.set_bounds(self.lb[index], self.ub[index], index)
+
+        self.changed = set(var for var in bounds
+                           if self.lb[var] != self.root_lb[var] or self.ub[var] != self.root_ub[var])
+
+
+class NodeSolver(object):
+    """ solves nodes of a tree with an LP model of the root problem, in the
+        process running the tree or in a worker process (see init_worker)
+    """
+
+    def __init__(self, solver, f, A, b, lb, ub, Aeq, beq):
+        self.lp = get_backend(solver)
+        self.lp.load(f, A, b, lb, ub, Aeq, beq)
+        self.bounds = ModelBounds(lb, ub)
+
+        # the number of rows added to the root problem (see solve)
+        self.rows_added = 0
+
+    def solve(self, bounds, basis=None, rows=None):
+        """ solve the node with the given bounds (see Node.bounds), warm
+            started from the given basis, or from the initial basis of the
+            root problem if None (not from the basis of whatever node the
+            model solved last, so that the result does not depend on which
+            worker solves the node)
+
+            rows are all the rows A x <= b added to the root problem so far
+            (e.g. the cuts of the tree), as (A, b), the model adds those it
+            does not have yet. a basis from before rows were added is not
+            used.
+
+            returns the solution, the objective value, the exit flag, the
+            number of LP iterations and the optimal basis
+        """
+        if rows is not None and len(rows[1]) > self.rows_added:
+            self.lp.add_rows(rows[0][self.rows_added:], rows[1][self.rows_added:])
+            self.rows_added = len(rows[1])
+
+        self.bounds.set(bounds, self.lp)
+        if basis is not None and basis[0] == self.rows_added:
+            self.lp.set_basis(basis[1])
+        else:
+            self.lp.reset_basis()
+
+        x_F, b_F, eflag = self.lp.solve()
+
+        # the basis is tagged with the rows of the model it belongs to
+        basis = self.lp.get_basis()
+        if basis is not None:
+            basis = (self.rows_added, basis)
+
+        return x_F, b_F, eflag, self.lp.iterations, basis
+
+    def delete(self):
+        self.lp.delete()
+
+
+# the NodeSolver of a worker process
+_node_solver = None
+
+
+def init_worker(*args):
+    """ create the NodeSolver of a worker process (the arguments are those of
+        NodeSolver), for use as the initializer of a multiprocessing Pool
+    """
+    global _node_solver
+    _node_solver = NodeSolver(*args)
+
+
+def solve_in_worker(task):
+    """ solve a node in a worker process, task is the bounds and basis
+        of the node and the rows added to the root problem
+    """
+    return _node_solver.solve(*task)
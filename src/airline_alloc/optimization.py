@@ -6,28 +6,24 @@
 """
 
 import numpy as np
-import copy
 
-# choose a liner program solver ('linprog' or 'lpsolve')
+from multiprocessing import Pool
+
+from scipy.sparse import coo_matrix
+
+from compact import CompactDataset
+from cuts import CutPool, Tableau, root_cuts, stack_rows
+from dataset import aircraft_trips
+from heuristics import Heuristics
+from nodes import Node, NodeQueue, NodeSolver, Pseudocosts, init_worker, solve_in_worker
+from presolve import Presolve
+
+# the default LP solver backend for branch_cut (see backends.py)
 # Note: as of this writing there is a bug in linprog that results in
 #       an incorrect answer, therefore 'lpsolve' is recommended until
 #       the bug is fixed (see linear_problem.py)
 solver = 'lpsolve'
 
-if solver == 'linprog':
-    try:
-        from scipy.optimize import linprog
-    except ImportError, e:
-        print "SciPy version >= 0.15.0 is required for linprog support!!"
-elif solver == 'lpsolve':
-    try:
-        from lpsolve55 import *
-    except ImportError:
-        print 'lpsolve is not available'
-else:
-    print 'You must choose an available LP solver'
-    exit(1)
-
 np.set_printoptions(linewidth=240)
 
 
@@ -35,30 +31,53 @@ def get_objective(data):
     """ generate the objective matrix for linprog
         returns the coefficients for the integer and continuous design variables
     """
+    return get_objective_terms(data).evaluate(data.constants.FuelCost)
 
-    J = data.inputs.DVector.shape[0]  # number of routes
-    K = len(data.inputs.AvailPax)     # number of aircraft types
-    KJ = K*J
 
-    fuelburn  = data.coefficients.Fuelburn
-    docnofuel = data.coefficients.Doc
-    price     = data.outputs.TicketPrice
-    fuelcost  = data.constants.FuelCost
+def get_objective_terms(data):
+    """ generate the objective in fuel-price-parametric form
+        (see ObjectiveTerms)
+    """
+    fuelburn  = np.asarray(data.coefficients.Fuelburn, dtype=float).flatten()
+    docnofuel = np.asarray(data.coefficients.Doc, dtype=float).flatten()
+    price     = np.asarray(data.outputs.TicketPrice, dtype=float).flatten()
+
+    return ObjectiveTerms(docnofuel, fuelburn, -price)
 
-    obj_int = np.zeros((KJ, 1))
-    obj_con = np.zeros((KJ, 1))
 
-    for kk in xrange(K):
-        for jj in xrange(J):
-            col = kk*J + jj
-            obj_int[col] = docnofuel[kk, jj] + fuelcost * fuelburn[kk, jj]
-            obj_con[col] = -price[kk, jj]
+class ObjectiveTerms(object):
+    """ the objective coefficients as a fixed base term plus a fuel burn term
+        that is scaled by the fuel cost:
+
+            obj_int = base + fuelcost * fuelburn
+            obj_con = con
+
+        so that the objective for another fuel cost needs no refiltering
+    """
 
-    return obj_int.flatten(), obj_con.flatten()
+    def __init__(self, base, fuelburn, con):
+        self.base     = base
+        self.fuelburn = fuelburn
+        self.con      = con
 
+    def evaluate(self, fuelcost):
+        """ returns the coefficients for the integer and continuous design
+            variables for the given fuel cost, or for an array of fuel costs
+            the integer coefficients for each fuel cost (one per row)
+        """
+        fuelcost = np.asarray(fuelcost, dtype=float)
+        if fuelcost.ndim == 0:
+            return self.base + fuelcost * self.fuelburn, self.con.copy()
 
-def get_constraints(data):
+        return self.base + np.outer(fuelcost, self.fuelburn), self.con.copy()
+
+
+def get_constraints(data, sparse=False):
     """ generate the constraint matrix/vector for linprog
+
+        the matrix is assembled from the (row, column, value) triplets of its
+        non-zeros. if sparse is True it is returned as a scipy.sparse CSR
+        matrix, which the branch_cut solvers also accept
     """
 
     J = data.inputs.DVector.shape[0]  # number of routes
@@ -73,50 +92,236 @@ def get_constraints(data):
     fleet = data.inputs.ACNum.reshape(-1, 1)
     t     = data.inputs.TurnAround
 
-    # Upper demand constraint
-    A1 = np.zeros((J, KJ2))
-    b1 = dem
-    for jj in xrange(J):
-        for kk in xrange(K):
-            col = K*J + kk*J + jj
-            A1[jj, col] = 1
+    # aircraft type and route of each trip variable (pax variables follow)
+    trip = np.arange(KJ)
+    pax  = KJ + trip
+    kk, jj = np.divmod(trip, J)
+    ones = np.ones(KJ)
+
+    rows = np.concatenate((
+        jj,                 # Upper demand constraint
+        J + jj,             # Lower demand constraint
+        2*J + kk,           # Aircraft utilization constraint
+        2*J + K + trip,     # Aircraft capacity constraint
+        2*J + K + trip,
+    ))
+    cols = np.concatenate((pax, pax, trip, trip, pax))
+    vals = np.concatenate((
+        ones,
+        -ones,
+        (BH*(1 + MH) + t).flatten(),
+        0.-cap[kk],
+        ones,
+    ))
+
+    A = coo_matrix((vals, (rows, cols)), shape=(2*J + K + KJ, KJ2))
+    A = A.tocsr() if sparse else A.toarray()
 
-    # Lower demand constraint
-    A2 = np.zeros((J, KJ2))
+    b1 = dem
     b2 = -0.2 * dem
-    for jj in xrange(J):
-        for kk in xrange(K):
-            col = K*J + kk*J + jj
-            A2[jj, col] = -1
-
-    # Aircraft utilization constraint
-    A3 = np.zeros((K, KJ2))
-    b3 = np.zeros((K, 1))
-    for kk in xrange(K):
-        for jj in xrange(J):
-            col = kk*J + jj
-            A3[kk, col] = BH[kk, jj]*(1 + MH[kk, 0]) + t
-        b3[kk, 0] = 12*fleet[kk]
-
-    # Aircraft capacity constraint
-    A4 = np.zeros((KJ, KJ2))
+    b3 = 12*fleet
     b4 = np.zeros((KJ, 1))
-    rw = 0
-    for kk in xrange(K):
-        for jj in xrange(J):
-            col1 = kk*J + jj
-            A4[rw, col1] = 0.-cap[kk]
-            col2 = K*J + kk*J + jj
-            A4[rw, col2] = 1
-            rw = rw + 1
-
-    A = np.concatenate((A1, A2, A3, A4))
+
     b = np.concatenate((b1, b2, b3, b4))
     return A, b
 
 
-def gomory_cut(x, A, b, Aeq, beq):
+def get_bounds(data):
+    """ generate the lower and upper bounds on the design variables,
+        the number of trips is bounded by MaxTrip
+    """
+    J = data.inputs.DVector.shape[0]  # number of routes
+    K = len(data.inputs.AvailPax)     # number of aircraft types
+    KJ = K*J
+
+    lb = np.zeros((2*KJ, 1))
+    ub = np.concatenate((
+        np.ones((KJ, 1)) * data.inputs.MaxTrip.reshape(-1, 1),
+        np.ones((KJ, 1)) * np.inf
+    ))
+    return lb, ub
+
+
+def get_trips_per_aircraft(data):
+    """ the number of trips a single aircraft of each type can make on each
+        route (K x J), from the scenario if data is a FilteredDataset
+    """
+    if hasattr(data, 'trips_per_aircraft'):
+        return data.trips_per_aircraft
+    return aircraft_trips(data.coefficients.BlockTime, data.constants.MH, data.inputs.TurnAround)
+
+
+def get_batch(data, dvectors=None, ac_nums=None, sparse=True):
+    """ generate the linear programs for N scenarios of the same network that
+        differ in route demand and/or fleet size
+
+        arguments:
+            dvectors    the route demand for each scenario, either N x J
+                        demand values or N DVector arrays (N x J x 2), a
+                        single DVector array (J x 2) is one scenario
+            ac_nums     the number of each aircraft for each scenario (N x K)
+
+        either may be omitted, in which case the values of the dataset are
+        used for every scenario
+
+        returns the objective f and constraint matrix A, which are the same
+        for all scenarios, and the N x m constraint vectors and N x n lower
+        and upper bounds (one scenario per row)
+    """
+    J = data.inputs.DVector.shape[0]  # number of routes
+    K = len(data.inputs.AvailPax)     # number of aircraft types
+    KJ = K*J
+
+    if dvectors is None:
+        dem = data.inputs.DVector[:, 1].reshape(1, J)
+    else:
+        dem = np.asarray(dvectors, dtype=float)
+        if dem.ndim == 2 and dem.shape == (J, 2):
+            # a single DVector array
+            dem = dem[:, 1]
+        elif dem.ndim == 3:
+            if dem.shape[1:] != (J, 2):
+                raise ValueError('the DVector arrays must be J x 2 (%d x 2)' % J)
+            dem = dem[:, :, 1]
+        elif dem.ndim > 1 and dem.shape[-1] != J:
+            raise ValueError('the demand must be given for each of the %d routes' % J)
+        if dem.size % J != 0:
+            raise ValueError('the demand must be given for each of the %d routes' % J)
+        dem = dem.reshape(-1, J)
+
+    ac_num = np.array(data.inputs.ACNum, dtype=float).reshape(1, K)
+    if ac_nums is None:
+        fleet = ac_num
+    else:
+        fleet = np.asarray(ac_nums, dtype=float).reshape(-1, K)
+
+    N = max(len(dem), len(fleet))
+    if len(dem) not in (1, N) or len(fleet) not in (1, N):
+        raise ValueError('the demand and fleet size must be given for the same number of scenarios')
+
+    f_int, f_con = get_objective(data)
+    f = np.concatenate((f_int, f_con))
+
+    A = get_constraints(data, sparse)[0]
+
+    B = np.zeros((N, A.shape[0]))
+    B[:, 0:J]       = dem
+    B[:, J:2*J]     = -0.2 * dem
+    B[:, 2*J:2*J+K] = 12 * fleet
+
+    lb, ub = get_bounds(data)
+    LB = np.repeat(lb.reshape(1, -1), N, axis=0)
+    UB = np.repeat(ub.reshape(1, -1), N, axis=0)
+
+    if ac_nums is not None:
+        trips = get_trips_per_aircraft(data)
+        UB[:, 0:KJ] += ((fleet - ac_num)[:, :, np.newaxis] * trips).reshape(-1, KJ)
+
+    return f, A, B, LB, UB
+
+
+class Formulation(object):
+    """ the linear program for a (filtered) dataset:
+
+            minimize f.x  subject to  A x <= b,  lb <= x <= ub
+
+        between scenario runs usually only the demand (DVector) or the fleet
+        size (ACNum) changes. update() applies such a change to the affected
+        rows of b and entries of ub in place; A and f are left untouched, so
+        a solver holding the model can keep its factorization and warm start.
+
+        data may be a scenario (see dataset.FilteredDataset) or its compact
+        form (see compact.py), either is kept up to date by update().
+
+        objective and constraints may replace get_objective and
+        get_constraints(data, sparse) in building the initial formulation,
+        the rows of b and entries of ub they return must be laid out the
+        same way for update() to apply.
+    """
+
+    def __init__(self, data, sparse=False, objective=None, constraints=None):
+        self.data = data
+
+        self.J = data.inputs.DVector.shape[0]  # number of routes
+        self.K = len(data.inputs.AvailPax)     # number of aircraft types
+
+        if objective is None:
+            objective = get_objective
+        self.f_int, self.f_con = objective(data)
+        self.f = np.concatenate((self.f_int, self.f_con))
+
+        if constraints is None:
+            self.A, self.b = get_constraints(data, sparse)
+        else:
+            self.A, self.b = constraints(data)
+        self.b = self.b.astype(float)
+
+        self.lb, self.ub = get_bounds(data)
+
+        self.ac_num = np.array(data.inputs.ACNum, dtype=float).flatten()
+        self._trips = None
+
+    @property
+    def trips_per_aircraft(self):
+        """ the number of trips a single aircraft of each type can make on
+            each route (K x J), which scales the MaxTrip bounds with the fleet
+        """
+        if self._trips is None:
+            self._trips = get_trips_per_aircraft(self.data)
+        return self._trips
+
+    def update(self, dvector=None, ac_num=None):
+        """ update the formulation for a new route demand and/or fleet size
+
+            the demand updates the upper and lower demand rows of b (b1, b2),
+            the fleet size updates the utilization rows of b (b3) and the
+            bounds on the number of trips. if the dataset is a scenario
+            (see dataset.FilteredDataset) or a CompactDataset it is replaced
+            by the updated one. returns self.
+        """
+        J, K = self.J, self.K
+
+        if dvector is not None:
+            dvector = np.asarray(dvector)
+            if dvector.shape[0] != J:
+                raise ValueError('the demand must be given for the same %d routes' % J)
+            dem = dvector[:, 1]
+            self.b[0:J, 0]   = dem
+            self.b[J:2*J, 0] = -0.2 * dem
+
+        if ac_num is not None:
+            ac_num = np.array(ac_num, dtype=float).flatten()
+            if len(ac_num) != K:
+                raise ValueError('the fleet size must be given for the same %d aircraft' % K)
+            delta = ac_num - self.ac_num
+            self.b[2*J:2*J+K, 0] = 12 * ac_num
+            self.ub[0:K*J, 0] += (delta.reshape(-1, 1) * self.trips_per_aircraft).flatten()
+            self.ac_num = ac_num
+
+        if hasattr(self.data, 'replace'):
+            overrides = {}
+            if dvector is not None:
+                overrides['dvector'] = dvector
+            if ac_num is not None:
+                overrides['ac_num'] = ac_num
+            self.data = self.data.replace(**overrides)
+        elif isinstance(self.data, CompactDataset):
+            fields = {'ACNum': self.ac_num.copy(), 'MaxTrip': self.ub[0:K*J, 0].copy()}
+            if dvector is not None:
+                fields['DVector'] = np.array(dvector, dtype=np.float64, order='C')
+            self.data = self.data.copy(inputs=self.data.inputs.copy(**fields))
+
+        return self
+
+
+def gomory_cut(x, A, b, Aeq, beq, basis=None):
     """ Gomory Cut (from 'GomoryCut.m')
+
+        if basis (the indices of the basic variables in [x, slacks], e.g.
+        from Backend.get_basic_indices) is given, the basis matrix is
+        factorized and only the tableau row of the cut is computed from it
+        (see cuts.Tableau), instead of the full tableau of a basis guessed
+        from x. a singular basis falls back to the latter.
     """
     num_des = len(x)
 
@@ -144,56 +349,79 @@ def gomory_cut(x, A, b, Aeq, beq):
     else:
         bcom = b
 
-    # Generate the Simplex optimal tableau
-    aaa = np.where(np.subtract(x_up, 0.) > 1e-06)
-    aaa = aaa[0]
-    cols = len(aaa)
-    rows = Acom.shape[0]
-    B = np.zeros((rows, cols))
-    for ii in range(cols):
-        B[:, ii] = Acom[:, aaa[ii]]
-
-    # tab = [B\Acom,B\bcom]
-    # if B is square then try solve, otherwise use least squares
-    if (B.shape[0] == B.shape[1]):
+    tableau = None
+    if basis is not None:
+        basis = np.asarray(basis, dtype=int)
         try:
-            B_Acom = np.linalg.solve(B, Acom)
-            B_bcom = np.linalg.solve(B, bcom)
-        except np.linalg.LinAlgError:  # Singular Matrix
+            tableau = Tableau(Acom, bcom, basis)
+        except RuntimeError:
+            # the basis is singular, use the tableau of x instead
+            tableau = None
+
+    if tableau is not None:
+        # Select the row of the basic design variable that has the highest
+        # fractional part (the rows of basic slacks are not cut on)
+        b_end = tableau.values
+        design = basis < num_des
+        aa = np.where(design & (np.abs(np.subtract(np.round(b_end), b_end)) > 1e-06))
+        if aa[0].size > 0:
+            rw_sel = np.argmax(np.where(design, np.remainder(np.abs(b_end), 1), -1.))
+            equ_cut = np.append(tableau.row(rw_sel), b_end[rw_sel])
+        else:
+            rw_sel = None
+    else:
+        # Generate the Simplex optimal tableau
+        aaa = np.where(np.subtract(x_up, 0.) > 1e-06)
+        aaa = aaa[0]
+        cols = len(aaa)
+        rows = Acom.shape[0]
+        B = np.zeros((rows, cols))
+        for ii in range(cols):
+            B[:, ii] = Acom[:, aaa[ii]]
+
+        # tab = [B\Acom,B\bcom]
+        # if B is square then try solve, otherwise use least squares
+        if (B.shape[0] == B.shape[1]):
+            try:
+                B_Acom = np.linalg.solve(B, Acom)
+                B_bcom = np.linalg.solve(B, bcom)
+            except np.linalg.LinAlgError:  # Singular Matrix
+                B_Acom = np.linalg.lstsq(B, Acom)[0]
+                B_bcom = np.linalg.lstsq(B, bcom)[0]
+        else:
             B_Acom = np.linalg.lstsq(B, Acom)[0]
             B_bcom = np.linalg.lstsq(B, bcom)[0]
-    else:
-        B_Acom = np.linalg.lstsq(B, Acom)[0]
-        B_bcom = np.linalg.lstsq(B, bcom)[0]
-    tab = np.concatenate((B_Acom, B_bcom), axis=1)
-
-    # clean up tab for comparison to MATLAB
-    # print 'tab: %s\n' % str(tab.shape), tab
-    # aaa = np.where(np.subtract(tab, 0.) > 1e-03)
-    # print 'aaa: \n', aaa
-    # cols = aaa[0]
-    # rows = aaa[1]
-    # tab0 = np.zeros(tab.shape)
-    # for col, row in zip(rows, cols):
-    #     tab0[row, col] = tab[row, col]
-    # print 'tab0: %s\n' % str(tab0.shape), tab0
-    # tab = tab0
-
-    # Generate cut
-    # Select the row from the optimal tableau corresponding
-    # to the basic design variable that has the highest fractional part
-    b_end = tab[:, -1]
-    aa = np.where(np.abs(np.subtract(np.round(b_end), b_end)) > 1e-06)
-    if aa[0].size > 0:
-        rw_sel = np.argmax(np.remainder(np.abs(b_end), 1))
-    else:
-        rw_sel = None
+        tab = np.concatenate((B_Acom, B_bcom), axis=1)
+
+        # clean up tab for comparison to MATLAB
+        # print 'tab: %s\n' % str(tab.shape), tab
+        # aaa = np.where(np.subtract(tab, 0.) > 1e-03)
+        # print 'aaa: \n', aaa
+        # cols = aaa[0]
+        # rows = aaa[1]
+        # tab0 = np.zeros(tab.shape)
+        # for col, row in zip(rows, cols):
+        #     tab0[row, col] = tab[row, col]
+        # print 'tab0: %s\n' % str(tab0.shape), tab0
+        # tab = tab0
+
+        # Generate cut
+        # Select the row from the optimal tableau corresponding
+        # to the basic design variable that has the highest fractional part
+        b_end = tab[:, -1]
+        aa = np.where(np.abs(np.subtract(np.round(b_end), b_end)) > 1e-06)
+        if aa[0].size > 0:
+            rw_sel = np.argmax(np.remainder(np.abs(b_end), 1))
+        else:
+            rw_sel = None
+
+        if rw_sel is not None:
+            equ_cut = tab[rw_sel, :]
 
     eflag = 0
 
     if rw_sel is not None:
         # apply Gomory cut
-        equ_cut = tab[rw_sel, :]
         lhs = np.floor(equ_cut)
         rhs = -(equ_cut - lhs)
         lhs[-1] = -lhs[-1]
@@ -242,12 +470,16 @@ def gomory_cut(x, A, b, Aeq, beq):
     return A_up, b_up, eflag
 
 
-def cut_plane(x, A, b, Aeq, beq, ind_con, ind_int, indeq_con, indeq_int, num_int):
+def cut_plane(x, A, b, Aeq, beq, ind_con, ind_int, indeq_con, indeq_int, num_int, basis=None):
     """ execute the cutting plane algorithm
         Extracts out only the integer design variables and their associated
         constrain matrices
         Important: Assumes the design vector as x = [x_integer;x_continuous]
         (from 'call_Cutplane.m')
+
+        basis is passed on to gomory_cut, the indices of the basic variables
+        of the integer problem [x_integer, slacks of the ind_int rows], e.g.
+        from Backend.get_basic_indices of its solve
     """
     # make sure x and b vectors are correct shape
     x = x.reshape(-1, 1)
@@ -276,7 +508,7 @@ def cut_plane(x, A, b, Aeq, beq, ind_con, ind_int, indeq_con, indeq_int, num_int
         Aeq_x_int = np.array([])
         beq_x_int = np.array([])
 
-    A_x_int_up, b_x_int_up, eflag = gomory_cut(x_trip, A_x_int, b_x_int, Aeq_x_int, beq_x_int)
+    A_x_int_up, b_x_int_up, eflag = gomory_cut(x_trip, A_x_int, b_x_int, Aeq_x_int, beq_x_int, basis)
 
     if eflag == 1:
         A_new = np.concatenate((A_x_int_up[-1, :], np.ones(num_con)))
@@ -290,7 +522,9 @@ def cut_plane(x, A, b, Aeq, beq, ind_con, ind_int, indeq_con, indeq_int, num_int
     return A_up, b_up
 
 
-def branch_cut(f_int, f_con, A, b, Aeq, beq, lb, ub, ind_conCon, ind_intCon, indeq_conCon, indeq_intCon):
+def branch_cut(f_int, f_con, A, b, Aeq, beq, lb, ub, ind_conCon, ind_intCon, indeq_conCon, indeq_intCon,
+               presolve=False, backend=None, node_select='max-bound', workers=None, cuts=False,
+               heuristics=(), heuristic_freq=10):
     """ This is the branch and cut algorithm
 
         INPUTS:
@@ -309,6 +543,31 @@ def branch_cut(f_int, f_con, A, b, Aeq, beq, lb, ub, ind_conCon, ind_intCon, ind
             ind_intCon - indices in the A matrix correspoding to the
             constraints containing integer and continuous (if any) type design variables
 
+            presolve - if True, the problem is reduced before branching (see
+            presolve.py) and the solutions are mapped back to the full problem
+
+            backend - the name of the LP solver backend (see backends.py),
+            by default the module level solver
+
+            node_select - the rule for selecting the next subproblem to solve,
+            one of 'max-bound' (the original rule), 'best-bound', 'depth-first'
+            or 'best-estimate' (see nodes.py)
+
+            workers - the number of worker processes to solve subproblems in,
+            one subproblem per worker at a time. the result is the same for
+            any given number of workers
+
+            cuts - if True, the LP relaxation of the root problem is
+            strengthened by rounds of Gomory mixed integer cuts, which are
+            kept in a pool for the whole tree: at each node the pool cuts
+            violated by its solution are added to the LP model for the
+            nodes that follow (see cuts.py)
+
+            heuristics - the primal heuristics to run on the root subproblem
+            and on every heuristic_freq'th subproblem after it, to find integer
+            solutions early, e.g. ('rounding', 'diving', 'fix-and-resolve')
+            (see heuristics.py)
+
         OUTPUTS:
             xopt - optimal x with integer soltuion.
             fopt - optimal objective funtion value
@@ -322,11 +581,21 @@ def branch_cut(f_int, f_con, A, b, Aeq, beq, lb, ub, ind_conCon, ind_intCon, ind
         (from 'branch_cut.m')
     """
 
+    if backend is None:
+        backend = solver
+
+    if presolve:
+        return branch_cut_presolved(f_int, f_con, A, b, Aeq, beq, lb, ub,
+                                    ind_conCon, ind_intCon, indeq_conCon, indeq_intCon,
+                                    backend=backend, node_select=node_select, workers=workers,
+                                    cuts=cuts, heuristics=heuristics, heuristic_freq=heuristic_freq)
+
     f = np.concatenate((f_int, f_con))
     num_int = len(f_int)
 
     _iter = 0
     funCall = 0
+    lp_iter = 0
     eflag = 0
     U_best = np.inf
     xopt = []
@@ -337,159 +606,192 @@ def branch_cut(f_int, f_con, A, b, Aeq, beq, lb, ub, ind_conCon, ind_intCon, ind
     opt_cr = 0.03
     node_num = 1
     tree = 1
+    pruned = 0
+
+    # the subproblems differ only in the bounds on the variables, a single
+    # LP model is kept for the tree (or by each worker process) and each
+    # node is stored as its parent and the bound changes it makes
+    # (see nodes.py)
+    root_lb = np.array(lb, dtype=float).flatten()
+    root_ub = np.array(ub, dtype=float).flatten()
+
+    # the cuts are valid for the whole tree, the root cuts are added to the
+    # rows of the tree's LP model and the pool cuts separated at the nodes
+    # to tree_rows, which are passed on to the LP models with the nodes
+    cut_pool = None
+    cuts_per_node = 10
+    tree_rows = (np.zeros((0, len(f))), np.zeros(0))
+
+    if cuts:
+        cut_pool = CutPool(len(f))
+        A_cut, b_cut, solves, iterations = root_cuts(backend, f, A, b, Aeq, beq,
+                                                     root_lb, root_ub, num_int, pool=cut_pool)
+        A, b = stack_rows(A, b, A_cut, b_cut)
+        funCall = funCall + solves
+        lp_iter = lp_iter + iterations
+        print '\n%d cuts added to the root problem\n' % len(b_cut)
+
+    pseudocosts = Pseudocosts(num_int)
+
+    Aset = NodeQueue(node_select)
+    Aset.push(Node(node=node_num, tree=tree))
+
+    # the LP models and worker processes are released however the search
+    # ends, including when the arguments turn out to be invalid
+    pool = None
+    node_solver = None
+    heur_solver = None
+    heur = None
 
-    class Problem(object):
-        pass
-
-    prob = Problem()
-    prob.f    = f
-    prob.A    = A
-    prob.b    = b
-    prob.Aeq  = Aeq
-    prob.beq  = beq
-    prob.lb   = lb
-    prob.ub   = ub
-    prob.b_F  = 0
-    prob.x_F  = []
-    prob.node = node_num
-    prob.tree = tree
-
-    Aset = []
-    Aset.append(prob)
-
-    while len(Aset) > 0 and ter_crit != 2:
-        _iter = _iter + 1
-
-        # pick a subproblem
-        # preference given to nodes with higher objective value
-        Fsub = -np.inf
-        for ii in range(len(Aset)):
-            if Aset[ii].b_F >= Fsub:
-                Fsub_i = ii
-                Fsub = Aset[ii].b_F
-
-        if solver == 'linprog':
-            # solve subproblem using linprog
-            bounds = zip(Aset[Fsub_i].lb.flatten(), Aset[Fsub_i].ub.flatten())
-            results = linprog(Aset[Fsub_i].f,
-                              A_eq=None,           b_eq=None,
-                              A_ub=Aset[Fsub_i].A, b_ub=Aset[Fsub_i].b,
-                              bounds=bounds,
-                              options={ 'maxiter': 1000, 'disp': True })
-
-            Aset[Fsub_i].x_F = results.x
-            Aset[Fsub_i].b_F = results.fun
-
-            # translate status to MATLAB equivalent exit flag
-            if results.status == 0:         # optimized
-                Aset[Fsub_i].eflag = 1
-            elif results.status == 1:       # max iterations
-                Aset[Fsub_i].eflag = 0
-            elif results.status == 2:       # infeasible
-                Aset[Fsub_i].eflag = -2
-            elif results.status == 3:       # unbounded
-                Aset[Fsub_i].eflag = -3
-            else:
-                Aset[Fsub_i].eflag = -1
-        elif solver == 'lpsolve':
-            # solve using lpsolve
-            obj = Aset[Fsub_i].f.tolist()
-            lp = lpsolve('make_lp', 0, len(obj))
-            lpsolve('set_verbose', lp, 'IMPORTANT')
-            lpsolve('set_obj_fn', lp, obj)
-
-            i = 0
-            for con in Aset[Fsub_i].A:
-                lpsolve('add_constraint', lp, con.tolist(), 'LE', Aset[Fsub_i].b[i])
-                i = i+1
-
-            for i in range (len(Aset[Fsub_i].lb)):
-                lpsolve('set_lowbo', lp, i+1,  Aset[Fsub_i].lb[i])
-                lpsolve('set_upbo',  lp, i+1, Aset[Fsub_i].ub[i])
-
-            results = lpsolve('solve', lp)
-
-            Aset[Fsub_i].x_F = np.array(lpsolve('get_variables', lp)[0])
-            Aset[Fsub_i].b_F = np.array(lpsolve('get_objective', lp))
-
-            # translate results to MATLAB equivalent exit flag
-            if results == 0:            # optimized
-                Aset[Fsub_i].eflag = 1
-            elif results == 2:          # infeasible
-                Aset[Fsub_i].eflag = -2
-            elif results == 3:          # unbounded
-                Aset[Fsub_i].eflag = -3
-            else:
-                Aset[Fsub_i].eflag = -1
-            lpsolve('delete_lp', lp)
+    try:
+        if workers is None or workers <= 1:
+            node_solver = NodeSolver(backend, f, A, b, root_lb, root_ub, Aeq, beq)
+            batch_size = 1
         else:
-            print 'You must choose an available LP solver'
-            exit(-1)
-
-        funCall = funCall + 1
-
-        # rounding integers
-        if Aset[Fsub_i].eflag == 1:
-            aa = np.where(np.abs(np.round(Aset[Fsub_i].x_F) - Aset[Fsub_i].x_F) <= 1e-06)
-            Aset[Fsub_i].x_F[aa] = np.round(Aset[Fsub_i].x_F[aa])
-
-            if _iter == 1:
-                x_best_relax = Aset[Fsub_i].x_F
-                f_best_relax = Aset[Fsub_i].b_F
-
-        if ((Aset[Fsub_i].eflag >= 1) and (Aset[Fsub_i].b_F < U_best)):
-            if np.linalg.norm(Aset[Fsub_i].x_F[range(num_int)] - np.round(Aset[Fsub_i].x_F[range(num_int)])) <= 1e-06:
-                can_x = [can_x, Aset[Fsub_i].x_F]
-                can_F = [can_F, Aset[Fsub_i].b_F]
-                x_best = Aset[Fsub_i].x_F
-                U_best = Aset[Fsub_i].b_F
-                print '======================='
-                print 'New solution found!'
-                print '======================='
-                del Aset[Fsub_i]  # Fathom by integrality
-                ter_crit = 1
-                if (abs(U_best - f_best_relax) / abs(f_best_relax)) <= opt_cr:
-                    ter_crit = 2
+            pool = Pool(workers, initializer=init_worker,
+                        initargs=(backend, f, A, b, root_lb, root_ub, Aeq, beq))
+            batch_size = workers
+
+        # the heuristics share the LP model of the tree, or have their own when
+        # the subproblems are solved by worker processes
+        if len(heuristics) > 0:
+            if node_solver is None:
+                heur_solver = NodeSolver(backend, f, A, b, root_lb, root_ub, Aeq, beq)
+            heur = Heuristics(heuristics, node_solver or heur_solver,
+                              f, A, b, num_int, heuristic_freq)
+
+        while len(Aset) > 0 and ter_crit != 2:
+            # pick subproblems, one for each worker, skipping those whose
+            # bound is not better than the incumbent
+            batch = []
+            while len(batch) < batch_size and len(Aset) > 0:
+                Fsub = Aset.pop()
+                if Fsub.bound < U_best:
+                    batch.append(Fsub)
+                else:
+                    pruned = pruned + 1
+
+            # solve subproblems, warm started from the optimal basis of the parent
+            tasks = [(Fsub.bounds(), Fsub.basis, tree_rows) for Fsub in batch]
+            if pool is None:
+                results = [node_solver.solve(*task) for task in tasks]
             else:
-                # FIXME: cut_plane is disabled for now due to inconsistent behavior
-                # apply cut to subproblem
-                # if Aset[Fsub_i].node != 1:
-                #     Aset[Fsub_i].A, Aset[Fsub_i].b = cut_plane(
-                #         Aset[Fsub_i].x_F,
-                #         Aset[Fsub_i].A, Aset[Fsub_i].b,
-                #         Aset[Fsub_i].Aeq, Aset[Fsub_i].beq,
-                #         ind_conCon, ind_intCon,
-                #         indeq_conCon, indeq_intCon,
-                #         num_int
-                #     )
-
-                # branching
-                x_ind_maxfrac = np.argmax(np.remainder(np.abs(Aset[Fsub_i].x_F[range(num_int)]), 1))
-                x_split = Aset[Fsub_i].x_F[x_ind_maxfrac]
-                print '\nBranching at tree: %d at x%d = %f\n' % (Aset[Fsub_i].tree, x_ind_maxfrac+1, x_split)
-                F_sub = [None, None]
-                for jj in 0, 1:
-                    F_sub[jj] = copy.deepcopy(Aset[Fsub_i])
-                    A_rw_add = np.zeros(len(Aset[Fsub_i].x_F))
-                    if jj == 0:
-                        A_con = 1
-                        b_con = np.floor(x_split)
-                    elif jj == 1:
-                        A_con = -1
-                        b_con = -np.ceil(x_split)
-
-                    A_rw_add[x_ind_maxfrac] = A_con
-                    A_up = np.concatenate((F_sub[jj].A, [A_rw_add]))
-                    b_up = np.append(F_sub[jj].b, b_con)
-                    F_sub[jj].A = A_up
-                    F_sub[jj].b = b_up
-                    F_sub[jj].tree = 10 * F_sub[jj].tree + (jj+1)
-                    node_num = node_num + 1
-                    F_sub[jj].node = node_num
-                del Aset[Fsub_i]
-                Aset.extend(F_sub)
-        else:
-            del Aset[Fsub_i]  # Fathomed by infeasibility or bounds
+                results = pool.map(solve_in_worker, tasks)
+
+            for Fsub, task, result in zip(batch, tasks, results):
+                if ter_crit == 2:
+                    break
+
+                x_F, b_F, Fsub_eflag, iterations, basis = result
+
+                _iter = _iter + 1
+
+                parent_F = Fsub.bound
+                Fsub.b_F = b_F
+                Fsub.basis = None
+                lp_iter = lp_iter + iterations
+
+                funCall = funCall + 1
+
+                # rounding integers
+                if Fsub_eflag == 1:
+                    aa = np.where(np.abs(np.round(x_F) - x_F) <= 1e-06)
+                    x_F[aa] = np.round(x_F[aa])
+
+                    if _iter == 1:
+                        x_best_relax = x_F
+                        f_best_relax = b_F
+
+                    if Fsub.branch is not None:
+                        pseudocosts.update(*Fsub.branch, increase=b_F - parent_F)
+
+                if ((Fsub_eflag >= 1) and (b_F < U_best)):
+                    if np.linalg.norm(x_F[range(num_int)] - np.round(x_F[range(num_int)])) <= 1e-06:
+                        can_x = [can_x, x_F]
+                        can_F = [can_F, b_F]
+                        x_best = x_F
+                        U_best = b_F
+                        pruned = pruned + Aset.prune(U_best)
+                        print '======================='
+                        print 'New solution found!'
+                        print '======================='
+                        # Fathom by integrality
+                        ter_crit = 1
+                        if (abs(U_best - f_best_relax) / abs(f_best_relax)) <= opt_cr:
+                            ter_crit = 2
+                    else:
+                        if cut_pool is not None:
+                            # add the violated pool cuts to the model, and age
+                            # the cuts that are not tight
+                            index = cut_pool.separate(x_F, cuts_per_node)
+                            if len(index) > 0:
+                                tree_rows = stack_rows(tree_rows[0], tree_rows[1],
+                                                       cut_pool.A[index], cut_pool.b[index])
+                            cut_pool.update(x_F)
+
+                        if heur is not None and heur.due(_iter):
+                            found = heur.run(x_F, task[0], U_best)
+                            if found is not None:
+                                name, x_H, U_H = found
+                                can_x = [can_x, x_H]
+                                can_F = [can_F, U_H]
+                                x_best = x_H
+                                U_best = U_H
+                                pruned = pruned + Aset.prune(U_best)
+                                print '======================='
+                                print 'New solution found by %s!' % name
+                                print '======================='
+                                ter_crit = 1
+                                if (abs(U_best - f_best_relax) / abs(f_best_relax)) <= opt_cr:
+                                    ter_crit = 2
+
+                                if ter_crit == 2 or b_F >= U_best:
+                                    # done, or fathomed by the heuristic solution
+                                    continue
+
+                        # branching
+                        x_ind_maxfrac = np.argmax(np.remainder(np.abs(x_F[range(num_int)]), 1))
+                        x_split = x_F[x_ind_maxfrac]
+                        print '\nBranching at tree: %d at x%d = %f\n' % (Fsub.tree, x_ind_maxfrac+1, x_split)
+
+                        estimates = pseudocosts.estimates(b_F, x_F[:num_int], x_ind_maxfrac)
+
+                        var_lb, var_ub = task[0].get(x_ind_maxfrac,
+                                                     (root_lb[x_ind_maxfrac], root_ub[x_ind_maxfrac]))
+                        for jj in 0, 1:
+                            if jj == 0:
+                                change = (x_ind_maxfrac, var_lb, np.floor(x_split))
+                                distance = x_split - np.floor(x_split)
+                            elif jj == 1:
+                                change = (x_ind_maxfrac, np.ceil(x_split), var_ub)
+                                distance = np.ceil(x_split) - x_split
+
+                            node_num = node_num + 1
+                            Aset.push(Node(Fsub, (change,), b_F,
+                                           estimate=estimates[jj],
+                                           branch=(x_ind_maxfrac, jj, distance),
+                                           basis=basis,
+                                           node=node_num,
+                                           tree=10 * Fsub.tree + (jj+1)))
+
+                # otherwise fathomed by infeasibility or bounds
+    finally:
+        if node_solver is not None:
+            node_solver.delete()
+        if heur_solver is not None:
+            heur_solver.delete()
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    if heur is not None:
+        funCall = funCall + heur.solves
+        lp_iter = lp_iter + heur.iterations
+
+    print '\n%d LP iterations in %d solves, %d subproblems pruned by bound\n' % (lp_iter, funCall, pruned)
+
+    if cut_pool is not None:
+        print '\n%d pool cuts added in the tree\n' % len(tree_rows[1])
 
     if ter_crit > 0:
         eflag = 1
@@ -505,6 +807,46 @@ def branch_cut(f_int, f_con, A, b, Aeq, beq, lb, ub, ind_conCon, ind_intCon, ind
     return xopt, fopt, can_x, can_F, x_best_relax, f_best_relax, funCall, eflag
 
 
+def branch_cut_presolved(f_int, f_con, A, b, Aeq, beq, lb, ub,
+                         ind_conCon, ind_intCon, indeq_conCon, indeq_intCon, **options):
+    """ presolve the problem, solve the reduced problem with branch_cut and
+        map the results back to the full problem (see branch_cut)
+    """
+    pre = Presolve(np.concatenate((f_int, f_con)), A, b, lb, ub, len(f_int), Aeq, beq)
+
+    if pre.infeasible:
+        print '\nPresolve found the problem to be infeasible\n'
+        print '\nNo solution found!!\n'
+        return [], [], [], [], [], [], 0, 0
+
+    print '\nPresolve removed %d of %d variables and %d of %d constraints\n' % (
+        len(pre.x_fixed) - len(pre.cols), len(pre.x_fixed),
+        len(b) - len(pre.rows), len(b))
+
+    if len(pre.cols) == 0:
+        # every variable is fixed
+        x = pre.postsolve(np.array([]))
+        return x, pre.offset, [[], x], [[], pre.offset], x, pre.offset, 0, 1
+
+    xopt, fopt, can_x, can_F, x_best_relax, f_best_relax, funCall, eflag = \
+        branch_cut(pre.f[:pre.num_int], pre.f[pre.num_int:],
+                   pre.A, pre.b, pre.Aeq, pre.beq, pre.lb, pre.ub,
+                   pre.row_indices(ind_conCon), pre.row_indices(ind_intCon),
+                   indeq_conCon, indeq_intCon, **options)
+
+    if eflag == 1:
+        xopt = pre.postsolve(xopt)
+        fopt = pre.objective(fopt)
+        can_x = pre.postsolve(can_x)
+        can_F = pre.objective(can_F)
+
+    if len(x_best_relax) > 0:
+        x_best_relax = pre.postsolve(x_best_relax)
+        f_best_relax = pre.objective(f_best_relax)
+
+    return xopt, fopt, can_x, can_F, x_best_relax, f_best_relax, funCall, eflag
+
+
 def generate_outputs(xopt, fopt, data):
     """ Generating Outputss from GAMS allocation solution
         (from 'OutputGen_AllCon.m')
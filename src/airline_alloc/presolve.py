@@ -0,0 +1,208 @@
+"""
+    presolve.py
+
+    reductions of the allocation MILP before it is solved by branch_cut
+
+    the problem  min f.x  s.t.  A x <= b,  Aeq x = beq,  lb <= x <= ub  is
+    reduced by repeatedly:
+        - tightening the variable bounds implied by each inequality row,
+          rounding the bounds of the integer variables
+        - dropping inequality rows that can not be violated within the bounds
+        - removing columns that are fixed (lb == ub), or that appear in no
+          remaining row and can be set to the bound favored by the objective
+
+    e.g. the trips of an aircraft type with no fleet are fixed at 0 by its
+    utilization row, and then so are its passengers by the capacity rows,
+    and the lower demand row of a route with no demand is redundant.
+
+    the reduced problem has the same form, with the integer variables first,
+    and a solution of the reduced problem is mapped back to the full problem
+    with postsolve().
+"""
+
+import numpy as np
+
+from scipy.sparse import csr_matrix, issparse
+
+
+class Presolve(object):
+    """ the presolved (reduced) problem and the map back to the full problem
+
+        attributes:
+            f, A, b, Aeq, beq, lb, ub   the reduced problem, A and Aeq are
+                                        sparse if A was given sparse
+            num_int                     the number of integer variables in the
+                                        reduced problem (its first columns)
+            cols, rows                  the indices of the columns and rows
+                                        of the full problem that are kept
+            x_fixed                     the values of the removed columns
+                                        (full length, 0 for kept columns)
+            offset                      the objective value of the removed
+                                        columns
+            infeasible                  True if the bounds were found to be
+                                        inconsistent, in which case the
+                                        reduced problem is not valid
+    """
+
+    def __init__(self, f, A, b, lb, ub, num_int, Aeq=None, beq=None, max_passes=20):
+        f  = np.asarray(f,  dtype=float).flatten()
+        b  = np.asarray(b,  dtype=float).flatten()
+        lb = np.array(lb, dtype=float).flatten()
+        ub = np.array(ub, dtype=float).flatten()
+
+        sparse = issparse(A)
+        A = csr_matrix(A, dtype=float)
+        m, n = A.shape
+
+        if Aeq is None or np.size(Aeq) == 0:
+            Aeq = csr_matrix((0, n))
+            beq = np.zeros(0)
+        else:
+            Aeq = csr_matrix(Aeq, dtype=float)
+            beq = np.asarray(beq, dtype=float).flatten()
+
+        is_int = np.arange(n) < num_int
+        in_eq  = np.zeros(n, dtype=bool)
+        in_eq[Aeq.tocoo().col] = True
+
+        rows = np.ones(m, dtype=bool)   # rows that are kept
+        cols = np.ones(n, dtype=bool)   # columns that are kept
+
+        self.infeasible = False
+
+        for p in xrange(max_passes):
+            # the non-zeros of the kept rows, indexed into the full problem
+            # (removed columns are fixed, so they just shift the activities)
+            A_coo = A[np.flatnonzero(rows)].tocoo()
+            row_ind = np.flatnonzero(rows)[A_coo.row]
+            col_ind = A_coo.col
+            vals    = A_coo.data
+
+            lb_new, ub_new = _implied_bounds(row_ind, col_ind, vals, b, lb, ub, m, n)
+
+            # round the bounds of the integer variables
+            ub_new[is_int] = np.floor(ub_new[is_int] + 1e-6)
+            lb_new[is_int] = np.ceil(lb_new[is_int] - 1e-6)
+
+            if np.any(lb_new > ub_new + 1e-6):
+                self.infeasible = True
+                break
+
+            # only accept significant changes, so that this terminates
+            tighter_ub = ub_new < ub - 1e-6 * (1 + np.abs(ub_new))
+            tighter_lb = lb_new > lb + 1e-6 * (1 + np.abs(lb_new))
+            ub[tighter_ub] = np.maximum(ub_new[tighter_ub], lb[tighter_ub])
+            lb[tighter_lb] = np.minimum(lb_new[tighter_lb], ub[tighter_lb])
+
+            # rows that can not be violated within the bounds
+            max_act = -_min_activity(row_ind, -vals, col_ind, lb, ub, m)
+            redundant = rows & (max_act <= b + 1e-9 * (1 + np.abs(b)))
+
+            # columns that appear in no remaining row are set to the bound
+            # favored by the objective
+            active = ~redundant[row_ind]
+            in_row = in_eq.copy()
+            in_row[col_ind[active]] = True
+
+            free = cols & ~in_row
+            to_lb = free & (f >= 0) & np.isfinite(lb)
+            to_ub = free & (f < 0)  & np.isfinite(ub)
+            ub[to_lb] = lb[to_lb]
+            lb[to_ub] = ub[to_ub]
+
+            fixed = cols & (ub - lb <= 1e-9)
+
+            if not (np.any(tighter_ub) or np.any(tighter_lb) or np.any(redundant) or np.any(fixed)):
+                break
+
+            rows &= ~redundant
+            cols &= ~fixed
+
+        self.cols = np.flatnonzero(cols)
+        self.rows = np.flatnonzero(rows)
+
+        self.x_fixed = np.where(cols, 0., lb)
+        self.offset  = f.dot(self.x_fixed)
+        self.num_int = int(np.sum(cols[:num_int]))
+
+        self.f   = f[self.cols]
+        self.A   = A[self.rows][:, self.cols]
+        self.b   = (b - A.dot(self.x_fixed))[self.rows].reshape(-1, 1)
+        self.Aeq = Aeq[:, self.cols]
+        self.beq = (beq - Aeq.dot(self.x_fixed)).reshape(-1, 1)
+        self.lb  = lb[self.cols].reshape(-1, 1)
+        self.ub  = ub[self.cols].reshape(-1, 1)
+
+        if not sparse:
+            self.A   = self.A.toarray()
+            self.Aeq = self.Aeq.toarray()
+
+    def row_indices(self, ind):
+        """ map indices of rows of the full problem to the indices of the
+            same rows in the reduced problem, omitting removed rows
+        """
+        ind = np.asarray(ind, dtype=int)
+        pos = np.searchsorted(self.rows, ind)
+        kept = pos < len(self.rows)
+        kept[kept] = self.rows[pos[kept]] == ind[kept]
+        return pos[kept].tolist()
+
+    def postsolve(self, x):
+        """ map a solution of the reduced problem (or the nested lists of
+            candidate solutions returned by branch_cut) to the full problem
+        """
+        if isinstance(x, list):
+            return [self.postsolve(value) for value in x]
+        full = self.x_fixed.copy()
+        full[self.cols] = np.asarray(x).flatten()
+        return full
+
+    def objective(self, fx):
+        """ map an objective value of the reduced problem (or nested lists of
+            values) to the full problem
+        """
+        if isinstance(fx, list):
+            return [self.objective(value) for value in fx]
+        return fx + self.offset
+
+
+def _min_activity(row_ind, vals, col_ind, lb, ub, m):
+    """ the minimum activity of each row within the bounds,
+        -inf where it is unbounded
+    """
+    act, num_inf, contrib = _min_contributions(row_ind, vals, col_ind, lb, ub, m)
+    act[num_inf > 0] = -np.inf
+    return act
+
+
+def _min_contributions(row_ind, vals, col_ind, lb, ub, m):
+    """ the finite part of the minimum activity of each row, the number of
+        unbounded (-inf) terms in each row and the term of each non-zero
+    """
+    contrib = vals * np.where(vals > 0, lb[col_ind], ub[col_ind])
+    finite = np.isfinite(contrib)
+    act = np.bincount(row_ind, weights=np.where(finite, contrib, 0.), minlength=m)
+    num_inf = np.bincount(row_ind, weights=~finite, minlength=m)
+    return act, num_inf, contrib
+
+
+def _implied_bounds(row_ind, col_ind, vals, b, lb, ub, m, n):
+    """ the bounds on each variable implied by the rows,
+        a_j x_j <= b - (minimum activity of the rest of the row)
+    """
+    act, num_inf, contrib = _min_contributions(row_ind, vals, col_ind, lb, ub, m)
+    finite = np.isfinite(contrib)
+
+    # the minimum activity of the rest of the row, if it is bounded
+    rest = np.where(finite, act[row_ind] - contrib, act[row_ind])
+    bounded = np.where(finite, num_inf[row_ind] == 0, num_inf[row_ind] == 1)
+
+    bound = (b[row_ind] - rest) / vals
+
+    lb_new = lb.copy()
+    ub_new = ub.copy()
+    upper = bounded & (vals > 0)
+    lower = bounded & (vals < 0)
+    np.minimum.at(ub_new, col_ind[upper], bound[upper])
+    np.maximum.at(lb_new, col_ind[lower], bound[lower])
+    return lb_new, ub_new
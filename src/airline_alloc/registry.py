@@ -0,0 +1,141 @@
+"""
+    registry.py
+
+    a process wide registry of loaded datasets
+
+    datasets are keyed by the path and mtime of their source files, so a
+    modified file is reloaded on next use. registered datasets are read-only
+    and shared by all callers, which should derive scenarios from them with
+    Dataset.filtered (or filter a copy, see Dataset.copy). their arrays are
+    not writeable and their structs reject assignment (see FrozenStruct), so
+    e.g. Dataset.filter raises rather than changing the dataset for everyone.
+    the registry is bounded by the total size of the arrays it holds, evicting
+    the least recently used datasets first.
+"""
+
+import copy
+import threading
+
+from collections import OrderedDict
+from os.path import abspath, getmtime, join
+
+import numpy as np
+
+from dataset import Dataset, data_path
+
+
+class DatasetRegistry(object):
+    """ thread-safe LRU cache of read-only datasets
+    """
+
+    def __init__(self, max_bytes=1 << 30):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._datasets = OrderedDict()  # key -> (dataset, nbytes)
+        self._lock = threading.RLock()
+
+    def get(self, file_name=None, suffix=None):
+        """ return the (read-only) dataset for the given file name or suffix,
+            loading it if it is not registered or its files have changed
+        """
+        if file_name is None and suffix is None:
+            raise ValueError('a file name or suffix is required')
+
+        data = Dataset(file_name, suffix)
+        key = self._key(data)
+
+        with self._lock:
+            if key in self._datasets:
+                entry = self._datasets.pop(key)
+                self._datasets[key] = entry
+                return entry[0]
+
+            # drop any previous version of the same files
+            paths = tuple(path for path, mtime in key)
+            for old in [k for k in self._datasets if tuple(p for p, m in k) == paths]:
+                self._remove(old)
+
+            data.prefetch()
+            nbytes = freeze(data)
+
+            self._datasets[key] = (data, nbytes)
+            self.nbytes += nbytes
+
+            # always keep the most recently loaded dataset
+            while self.nbytes > self.max_bytes and len(self._datasets) > 1:
+                self._remove(next(iter(self._datasets)))
+
+            return data
+
+    def clear(self):
+        """ remove all datasets from the registry
+        """
+        with self._lock:
+            self._datasets.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._datasets)
+
+    def _remove(self, key):
+        data, nbytes = self._datasets.pop(key)
+        self.nbytes -= nbytes
+
+    def _key(self, data):
+        files = sorted(set(file_name for file_name, struct in data._sources.values()))
+        paths = [abspath(join(data_path, file_name)) for file_name in files]
+        return tuple((path, getmtime(path)) for path in paths)
+
+
+class FrozenStruct(object):
+    """ a read-only view of a struct of a registered dataset
+
+        assigning a field raises AttributeError, a copy (see Dataset.copy)
+        is a shallow copy of the struct that can be modified
+    """
+
+    def __init__(self, struct):
+        self.__dict__['_struct'] = struct
+
+    def __getattr__(self, name):
+        if name.startswith('__') or '_struct' not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.__dict__['_struct'], name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("can't set '%s', the datasets of the registry are read-only "
+                             "(filter a copy, see Dataset.copy)" % name)
+
+    def __delattr__(self, name):
+        raise AttributeError("can't delete '%s', the datasets of the registry are read-only "
+                             "(filter a copy, see Dataset.copy)" % name)
+
+    def __copy__(self):
+        return copy.copy(self.__dict__['_struct'])
+
+
+def freeze(data):
+    """ make the arrays of a dataset read-only and replace its structs with
+        FrozenStructs, returns the total size of the arrays in bytes
+    """
+    nbytes = 0
+    for key in data.structs:
+        struct = getattr(data, key.lower())
+        for field in getattr(struct, '_fieldnames', []):
+            value = getattr(struct, field)
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+                nbytes += value.nbytes
+        if struct is not None:
+            setattr(data, key.lower(), FrozenStruct(struct))
+    return nbytes
+
+
+# the process wide registry
+registry = DatasetRegistry()
+
+
+def get_dataset(file_name=None, suffix=None):
+    """ get a shared, read-only dataset from the process wide registry
+    """
+    return registry.get(file_name, suffix)
@@ -0,0 +1,124 @@
+"""
+    routes.py
+
+    an index over the routes of a dataset (Inputs.RVector and Inputs.DVector)
+
+    all queries return arrays of route indices that can be passed
+    directly to Dataset.filter as route_ind
+"""
+
+import numpy as np
+
+
+class RouteIndex(object):
+    """ sorted-distance index for answering batched route lookups
+
+        routes with equal distance are kept in their original order, so that
+        lookups resolve ties to the lowest route index
+
+        if the route demand (DVector) is given, routes can also be
+        selected by demand
+    """
+
+    def __init__(self, RVector, DVector=None):
+        self.RVector = RVector
+        self.DVector = DVector
+
+        distances = np.asarray(RVector, dtype=float).ravel()
+        valid = np.flatnonzero(~np.isnan(distances))
+
+        # route indices in order of ascending distance, and those distances
+        self.order = valid[np.argsort(distances[valid], kind='mergesort')]
+        self.distances = distances[self.order]
+
+        # the distinct distances and the lowest route index for each of them
+        self._unique, first = np.unique(self.distances, return_index=True)
+        self._first = self.order[first]
+
+    def __len__(self):
+        return len(self.order)
+
+    def nearest(self, distance):
+        """ find the closest route for each value in distance
+            returns an index into RVector for each value in distance
+        """
+        distance = np.asarray(distance, dtype=float).ravel()
+        if len(self._unique) == 0:
+            return np.zeros(len(distance), dtype=int)
+
+        # the candidates are the nearest distinct distances on either side
+        pos = np.searchsorted(self._unique, distance)
+        lo = np.clip(pos - 1, 0, len(self._unique) - 1)
+        hi = np.clip(pos,     0, len(self._unique) - 1)
+
+        diff_lo = np.abs(distance - self._unique[lo])
+        diff_hi = np.abs(distance - self._unique[hi])
+        ind_lo  = self._first[lo]
+        ind_hi  = self._first[hi]
+
+        indices = np.where(diff_lo < diff_hi, ind_lo,
+                  np.where(diff_hi < diff_lo, ind_hi, np.minimum(ind_lo, ind_hi)))
+
+        # no finite difference (e.g. a NaN distance) selects the first route
+        indices[~(np.minimum(diff_lo, diff_hi) < np.inf)] = 0
+
+        return indices.astype(int)
+
+    def within(self, lo, hi):
+        """ find the routes with a distance between lo and hi (inclusive)
+            returns the route indices in ascending order
+        """
+        start = np.searchsorted(self.distances, lo, side='left')
+        stop  = np.searchsorted(self.distances, hi, side='right')
+        return np.sort(self.order[start:stop])
+
+    def k_nearest(self, distance, k):
+        """ find the k closest routes to each value in distance, ordered by
+            increasing difference in distance (ties to the lowest index)
+            returns an array of k route indices for each value in distance
+            (or a single array if distance is a scalar)
+        """
+        scalar = np.isscalar(distance)
+        distance = np.asarray(distance, dtype=float).reshape(-1, 1)
+
+        n = len(self.order)
+        k = min(k, n)
+
+        if k == 0:
+            nearest = np.zeros((len(distance), 0), dtype=int)
+        else:
+            # the k nearest routes lie within k places of the insertion point,
+            # extended on the left to the start of the run of routes with the
+            # same distance, whose lowest indices come first
+            ins   = np.searchsorted(self.distances, distance)
+            start = np.searchsorted(self.distances, self.distances[np.maximum(ins - k, 0)], side='left')
+            stop  = np.minimum(ins + k, n)
+
+            window = start + np.arange(np.max(stop - start))
+            outside = window >= stop
+            window = np.clip(window, 0, n - 1)
+
+            routes = self.order[window]
+            diff = np.abs(self.distances[window] - distance)
+            diff[outside] = np.inf
+
+            ind = np.lexsort((routes, diff), axis=-1)[:, :k]
+            nearest = routes[np.arange(len(routes)).reshape(-1, 1), ind]
+
+        return nearest[0] if scalar else nearest
+
+    def demand_above(self, demand):
+        """ find the routes with a demand greater than the given value
+            returns the route indices in ascending order
+        """
+        if self.DVector is None:
+            raise ValueError('route demand (DVector) is not available')
+
+        if self.__dict__.get('_demand') is None:
+            dvector = np.asarray(self.DVector, dtype=float)
+            demands = dvector[:, 1] if dvector.ndim == 2 else dvector
+            self._demand_order = np.argsort(demands, kind='mergesort')
+            self._demand = demands[self._demand_order]
+
+        start = np.searchsorted(self._demand, demand, side='right')
+        return np.sort(self._demand_order[start:])
@@ -0,0 +1,102 @@
+import unittest
+from nose import SkipTest
+
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
+
+from airline_alloc.backends import get_backend, backends, has_simplex
+
+
+class BackendTestCase(unittest.TestCase):
+    """ test the LP solver backends
+
+        maximize x + y  s.t.  x + 2y <= 4,  3x + y <= 5,  0 <= x, y
+        has the solution x = 1.2, y = 1.4
+    """
+
+    f  = np.array([-1., -1.])
+    A  = np.array([[1., 2.], [3., 1.]])
+    b  = np.array([4., 5.])
+    lb = np.array([0., 0.])
+    ub = np.array([np.inf, np.inf])
+
+    def backend(self, name):
+        lp = get_backend(name)
+        try:
+            lp.load(self.f, self.A, self.b, self.lb, self.ub)
+            x, fun, eflag = lp.solve()
+        except ImportError, err:
+            raise SkipTest(str(err))
+        except ValueError, err:
+            # e.g. the HiGHS methods are not available
+            raise SkipTest(str(err))
+
+        self.assertEqual(eflag, 1)
+        self.assertTrue(np.allclose(x, [1.2, 1.4]))
+        self.assertAlmostEqual(fun, -2.6)
+        return lp
+
+    def check_modify(self, lp):
+        # bound y
+        lp.set_bounds([0.], [1.], [1])
+        x, fun, eflag = lp.solve()
+        self.assertEqual(eflag, 1)
+        self.assertTrue(np.allclose(x, [4./3., 1.]))
+
+        # add x <= 1
+        lp.add_rows(np.array([[1., 0.]]), [1.])
+        x, fun, eflag = lp.solve()
+        self.assertEqual(eflag, 1)
+        self.assertTrue(np.allclose(x, [1., 1.]))
+
+        # infeasible
+        lp.set_bounds([2., 0.], [np.inf, 1.])
+        x, fun, eflag = lp.solve()
+        self.assertEqual(eflag, -2)
+
+        lp.delete()
+
+    def check_duals(self, duals):
+        # both rows are tight, -(x + y) decreases by 0.4 per unit of the
+        # first and 0.2 per unit of the second
+        self.assertTrue(np.allclose(duals, [-0.4, -0.2]), msg=str(duals))
+
+    def test_linprog(self):
+        lp = self.backend('linprog')
+        if has_simplex():
+            self.assertEqual(lp.method, 'simplex')
+        else:
+            self.assertEqual(lp.method, 'highs')
+
+        # both variables are basic, the slacks of the tight rows are not
+        self.assertEqual(sorted(lp.get_basic_indices()), [0, 1])
+
+        self.check_modify(lp)
+
+    def test_highs(self):
+        lp = self.backend('highs')
+        self.assertTrue(issparse(lp.A))
+        duals = lp.get_duals()
+        if duals is not None:
+            self.check_duals(duals)
+        self.check_modify(lp)
+
+    def test_lpsolve(self):
+        lp = self.backend('lpsolve')
+        self.check_duals(lp.get_duals())
+        self.check_modify(lp)
+
+    def test_sparse(self):
+        lp = get_backend('linprog')
+        lp.load(self.f, csr_matrix(self.A), self.b, self.lb, self.ub)
+        x, fun, eflag = lp.solve()
+        self.assertEqual(eflag, 1)
+        self.assertTrue(np.allclose(x, [1.2, 1.4]))
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, get_backend, 'cplex')
+        self.assertEqual(sorted(backends), ['highs', 'linprog', 'lpsolve'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from os.path import join
+
+import numpy as np
+
+from airline_alloc import cache
+from airline_alloc.dataset import data_path, load_data
+
+
+class CacheTestCase(unittest.TestCase):
+    """ test the binary dataset cache
+    """
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache_path = cache.cache_path
+        cache.cache_path = join(self.tempdir, 'cache')
+
+        # work on a copy of the source so that it can be modified
+        self.file_name = join(self.tempdir, 'inputs_after_3routes.mat')
+        shutil.copy(join(data_path, 'inputs_after_3routes.mat'), self.file_name)
+
+    def tearDown(self):
+        cache.cache_path = self.cache_path
+        shutil.rmtree(self.tempdir)
+
+    def test_roundtrip(self):
+        expected = load_data(self.file_name, cache=False)['Inputs']
+        inputs = load_data(self.file_name, cache=True)['Inputs']
+
+        self.assertEqual(inputs._fieldnames, expected._fieldnames)
+        for field in expected._fieldnames:
+            value = getattr(inputs, field)
+            if isinstance(value, np.ndarray) and value.dtype != object:
+                self.assertTrue(np.array_equal(value, getattr(expected, field)), msg=field)
+
+        self.assertEqual(inputs.TurnAround, expected.TurnAround)
+        self.assertTrue(isinstance(inputs.RVector, np.memmap))
+        self.assertFalse(inputs.RVector.flags.writeable)
+
+    def test_reuse(self):
+        load_data(self.file_name)
+        entry = cache._entry_path(self.file_name)
+
+        # touching the source without changing it keeps the entry
+        os.utime(self.file_name, (0, 0))
+        self.assertTrue(cache._valid_manifest(entry, self.file_name) is not None)
+        inputs = load_data(self.file_name)['Inputs']
+        self.assertTrue(isinstance(inputs.RVector, np.memmap))
+        self.assertTrue(os.path.exists(join(entry, 'Inputs.RVector.npy')))
+
+    def test_stale(self):
+        load_data(self.file_name)
+        entry = cache._entry_path(self.file_name)
+
+        # replacing the content of the source invalidates the entry
+        shutil.copy(join(data_path, 'inputs_after_11routes.mat'), self.file_name)
+        os.utime(self.file_name, (0, 0))
+        self.assertTrue(cache._valid_manifest(entry, self.file_name) is None)
+
+        inputs = load_data(self.file_name)['Inputs']
+        self.assertEqual(len(inputs.RVector), 11)
+
+
+if __name__ == "__main__":
+    unittest.main()
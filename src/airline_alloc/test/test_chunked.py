@@ -0,0 +1,121 @@
+import shutil
+import tempfile
+import unittest
+
+from os.path import join
+
+import numpy as np
+
+from airline_alloc.cache import MatStruct
+from airline_alloc.chunked import ChunkedArray, convert
+from airline_alloc.dataset import Dataset, load_data
+
+
+class ChunkedStoreTestCase(unittest.TestCase):
+    """ test the chunked dataset store
+    """
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+        # the bundled data has no Constants, so they are made up
+        self.data = Dataset()
+        for key in ['Inputs', 'Outputs', 'Coefficients']:
+            setattr(self.data, key.lower(), load_data(key.lower() + '_before_3routes.mat')[key])
+        self.data.constants = MatStruct(['MH'])
+        self.data.constants.MH = np.linspace(0.1, 0.5, 18)
+
+        self.ac_ind   = np.array([9, 10]) - 1
+        self.ac_num   = np.array([6,  4])
+        self.distance = np.array([2000, 1500, 1000])
+        self.dvector  = np.array([[1, 300], [2, 700], [3, 220]])
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def check_store(self, compress):
+        store = join(self.tempdir, 'Dataset.chunks')
+        convert(self.data, store, block_size=100, compress=compress)
+
+        data = Dataset(store)
+        fuelburn = data.coefficients.Fuelburn
+        self.assertTrue(isinstance(fuelburn, ChunkedArray))
+        self.assertEqual(fuelburn.shape, (18, 2134))
+        self.assertTrue(np.array_equal(np.asarray(fuelburn), self.data.coefficients.Fuelburn))
+        self.assertTrue(np.array_equal(data.inputs.RVector, self.data.inputs.RVector))
+
+        # filtering reads only the blocks containing the selected routes
+        blocks = []
+        read_block = ChunkedArray.read_block
+
+        def counting_read_block(self, b):
+            blocks.append(b)
+            return read_block(self, b)
+
+        ChunkedArray.read_block = counting_read_block
+        try:
+            scenario = data.filtered(self.ac_ind, self.ac_num, self.distance, self.dvector)
+            expected = self.data.filtered(self.ac_ind, self.ac_num, self.distance, self.dvector)
+            for name in ['Fuelburn', 'Doc', 'Nox', 'BlockTime']:
+                self.assertTrue(np.array_equal(getattr(scenario.coefficients, name),
+                                               getattr(expected.coefficients, name)), msg=name)
+            self.assertTrue(np.array_equal(scenario.outputs.TicketPrice, expected.outputs.TicketPrice))
+            self.assertTrue(np.array_equal(scenario.inputs.MaxTrip, expected.inputs.MaxTrip))
+        finally:
+            ChunkedArray.read_block = read_block
+
+        route_ind = np.array([80, 1782, 674]) - 1
+        self.assertEqual(sorted(set(blocks)), sorted(set(route_ind // 100)))
+
+    def test_store(self):
+        self.check_store(compress=False)
+
+    def test_compressed(self):
+        self.check_store(compress=True)
+
+    def test_getitem(self):
+        store = join(self.tempdir, 'Dataset.chunks')
+        convert(self.data, store, block_size=100)
+
+        fuelburn = Dataset(store).coefficients.Fuelburn
+        expected = self.data.coefficients.Fuelburn
+
+        blocks = []
+        read_block = ChunkedArray.read_block
+
+        def counting_read_block(self, b):
+            blocks.append(b)
+            return read_block(self, b)
+
+        ChunkedArray.read_block = counting_read_block
+        try:
+            # keys that read only the blocks of the selected routes
+            for key, read in [
+                ((3, 250),                      [2]),
+                ((-1, -1),                      [21]),
+                ((slice(None), 1782),           [17]),
+                ((slice(2, 5), slice(90, 110)), [0, 1]),
+                ((8, [80, 1782, 674]),          [0, 6, 17]),
+                ((np.array([9, 8]), [79, 673]), [0, 6]),
+                (([9, 8], slice(None, 50)),     [0]),
+                ((slice(None), []),             []),
+            ]:
+                del blocks[:]
+                value = fuelburn[key]
+                self.assertTrue(np.array_equal(value, expected[key]), msg=str(key))
+                self.assertEqual(np.shape(value), np.shape(expected[key]), msg=str(key))
+                self.assertEqual(sorted(set(blocks)), read, msg=str(key))
+
+            # any other key reads the whole table
+            mask = np.arange(18) % 2 == 0
+            self.assertTrue(np.array_equal(fuelburn[mask], expected[mask]))
+            self.assertTrue(np.array_equal(fuelburn[3], expected[3]))
+        finally:
+            ChunkedArray.read_block = read_block
+
+        self.assertRaises(IndexError, fuelburn.__getitem__, (18, 0))
+        self.assertRaises(IndexError, fuelburn.__getitem__, (0, [5, 2134]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+import unittest
+import itertools
+
+import numpy as np
+
+from airline_alloc.cuts import gmi_cuts, basis_from_solution, CutPool, Tableau, root_cuts
+from airline_alloc import optimization
+from airline_alloc.optimization import Formulation
+from airline_alloc.test.test_optimization import branch_cut_3routes, dataset_3routes, expected_x
+
+
+class GMICutsTestCase(unittest.TestCase):
+    """ test the gmi_cuts function
+    """
+
+    def test_problem(self):
+        """ the test problem from GomoryCut.m, x is the vertex where both
+            rows are tight
+        """
+        A = np.array([
+            [2./5., 1.],
+            [2./5., -2./5.]
+        ])
+        b = np.array([3., 1.])
+        x = np.array([55./14., 10./7.])
+
+        A_cut, b_cut = gmi_cuts(x, A, b, None, None, [0, 0], [10, 10], 2)
+
+        # one cut from each fractional basic variable, violated by x
+        self.assertEqual(A_cut.shape, (2, 2))
+        self.assertTrue(np.all(A_cut.dot(x) > b_cut))
+
+        # and satisfied by every integer point
+        points = np.array([p for p in itertools.product(range(11), repeat=2)
+                           if np.all(A.dot(p) <= b + 1e-9)])
+        self.assertTrue(np.all(points.dot(A_cut.T) <= b_cut + 1e-9))
+
+    def test_basis(self):
+        A = np.array([
+            [2./5., 1.],
+            [2./5., -2./5.]
+        ])
+        x = np.array([55./14., 10./7.])
+
+        # both variables are basic and both slacks are nonbasic (at 0)
+        Acom = np.concatenate((A, np.eye(2)), axis=1)
+        z = np.concatenate((x, [0., 0.]))
+        basis = basis_from_solution(Acom, z, np.zeros(4), np.inf * np.ones(4))
+        self.assertEqual(sorted(basis), [0, 1])
+
+        # a degenerate vertex is completed with slacks
+        z = np.array([0., 0., 3., 1.])
+        basis = basis_from_solution(Acom, z, np.zeros(4), np.inf * np.ones(4))
+        self.assertEqual(sorted(basis), [2, 3])
+
+    def test_tableau(self):
+        np.random.seed(0)
+        A = np.random.rand(20, 30) * (np.random.rand(20, 30) < 0.3) + np.eye(20, 30)
+        Acom = np.concatenate((A, np.eye(20)), axis=1)
+        bcom = np.random.rand(20)
+        basis = np.concatenate((np.arange(10), 30 + np.arange(10, 20)))
+
+        tableau = Tableau(Acom, bcom, basis)
+
+        # the rows of B\Acom and B\bcom
+        B = Acom[:, basis]
+        self.assertTrue(np.allclose(tableau.values, np.linalg.solve(B, bcom)))
+        for r in (0, 9, 15):
+            self.assertTrue(np.allclose(tableau.row(r), np.linalg.solve(B, Acom)[r]))
+
+    def test_3routes(self):
+        form = Formulation(dataset_3routes())
+
+        A_cut, b_cut, solves, iterations = \
+            root_cuts('linprog', form.f, form.A, form.b, None, None, form.lb, form.ub, len(form.f_int))
+
+        self.assertTrue(len(b_cut) > 0)
+        self.assertTrue(solves > 1)
+
+        # the MATLAB solution is not cut off
+        self.assertTrue(np.all(A_cut.dot(expected_x) <= b_cut + 1e-6))
+
+
+class CutPoolTestCase(unittest.TestCase):
+    """ test the CutPool class
+    """
+
+    def test_pool(self):
+        pool = CutPool(2, max_age=1)
+
+        # the second cut is parallel to the first
+        pool.add(np.array([[1., 0.], [2., 0.], [0., 1.]]), np.array([1., 2., 1.]))
+        self.assertEqual(len(pool), 2)
+
+        # only the first cut is violated
+        x = np.array([2., 0.])
+        self.assertTrue(np.allclose(pool.efficacy(x), [1., -1.]))
+        self.assertEqual(pool.separate(x, 10), [0])
+        self.assertEqual(pool.separate(x, 10), [])
+
+        # the second cut is not tight, and is dropped when too old
+        x = np.array([1., 0.])
+        pool.update(x)
+        self.assertEqual(pool.age.tolist(), [0, 1])
+        pool.update(x)
+        self.assertEqual(len(pool), 1)
+
+        A_cut, b_cut = pool.active()
+        self.assertEqual(A_cut.tolist(), [[1., 0.]])
+        self.assertEqual(b_cut.tolist(), [1.])
+
+
+class BranchCutTestCase(unittest.TestCase):
+    """ test branch_cut with cuts
+    """
+
+    def test_3routes(self):
+        funCalls = []
+        for cuts in (False, True):
+            xopt, fopt, can_x, can_F, x_best_relax, f_best_relax, funCall, eflag = \
+                branch_cut_3routes(backend='linprog', node_select='best-bound', cuts=cuts)
+
+            self.assertEqual(eflag, 1)
+            self.assertTrue(np.allclose(xopt, expected_x))
+            funCalls.append(funCall)
+
+        # the cuts tighten the relaxation, so fewer nodes are solved
+        self.assertTrue(funCalls[1] < funCalls[0])
+
+    def test_pool(self):
+        RecordingPool.pools = []
+        optimization.CutPool = RecordingPool
+        try:
+            for workers in (None, 2):
+                xopt, fopt, can_x, can_F, x_best_relax, f_best_relax, funCall, eflag = \
+                    branch_cut_3routes(backend='linprog', node_select='best-bound',
+                                       workers=workers, cuts=True)
+
+                self.assertEqual(eflag, 1)
+                self.assertTrue(np.allclose(xopt, expected_x))
+        finally:
+            optimization.CutPool = CutPool
+
+        # a single pool for each tree, separated at the root and at the nodes
+        # (there are at most 10 rounds at the root)
+        self.assertEqual(len(RecordingPool.pools), 2)
+        for pool in RecordingPool.pools:
+            self.assertTrue(len(pool.separated) > 10)
+
+            # the root cuts that were not tight were left in the pool, and
+            # dropped when they had not been violated for max_age nodes
+            self.assertTrue(max(pool.separated) > len(pool))
+            self.assertTrue(np.all(pool.in_lp))
+
+
+class RecordingPool(CutPool):
+    """ a CutPool that records its size at each separation
+    """
+
+    pools = []
+
+    def __init__(self, *args, **kwargs):
+        super(RecordingPool, self).__init__(*args, **kwargs)
+        self.separated = []
+        self.pools.append(self)
+
+    def separate(self, x, max_cuts):
+        self.separated.append(len(self))
+        return super(RecordingPool, self).separate(x, max_cuts)
+
+
+if __name__ == "__main__":
+    unittest.main()
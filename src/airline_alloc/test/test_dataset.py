@@ -1,9 +1,12 @@
 
 import unittest
+import cPickle as pickle
 
 import numpy as np
 
 from airline_alloc.dataset import *
+from airline_alloc.cache import MatStruct
+from airline_alloc.routes import RouteIndex
 
 
 class RangeExtractTestCase(unittest.TestCase):
@@ -54,6 +57,80 @@ class RangeExtractTestCase(unittest.TestCase):
         self.assertTrue(np.allclose(indices, expected-1))  # zero indexing
 
 
+    def test_ties(self):
+        RVector = np.array([500., 300., 700., 300., 500., np.nan, 900.])
+
+        distance = np.array([400, 300, 600, 800, 2000, -10, 500, np.nan])
+
+        # reference: the original linear scan, first closest match wins
+        expected = np.zeros(len(distance), dtype=int)
+        for cc, dist in enumerate(distance):
+            diff_min = np.inf
+            for r_id, r_dist in np.ndenumerate(RVector):
+                if np.abs(r_dist - dist) < diff_min:
+                    expected[cc] = r_id[0]
+                    diff_min = np.abs(r_dist - dist)
+
+        indices = range_extract(RVector, distance)
+
+        self.assertTrue(np.array_equal(indices, expected),
+            msg='\n' + str(indices) + '\n' + str(expected))
+
+
+class RouteIndexTestCase(unittest.TestCase):
+    """ test the route index queries
+    """
+
+    def setUp(self):
+        inputs = load_data('inputs_before_3routes.mat')['Inputs']
+        self.RVector = inputs.RVector
+        self.demand  = inputs.DVector[:, 1]
+        self.index   = RouteIndex(inputs.RVector, inputs.DVector)
+
+    def test_within(self):
+        indices = self.index.within(500, 900)
+        expected = np.where((self.RVector >= 500) & (self.RVector <= 900))[0]
+        self.assertTrue(np.array_equal(indices, expected))
+
+        self.assertEqual(len(self.index.within(900, 500)), 0)
+
+    def test_k_nearest(self):
+        for distance in [0, 1200, 1357.5, 1e5]:
+            indices = self.index.k_nearest(distance, 10)
+            diff = np.abs(self.RVector - distance)
+            expected = np.lexsort((np.arange(len(diff)), diff))[:10]
+            self.assertTrue(np.array_equal(indices, expected),
+                msg='\n' + str(indices) + '\n' + str(expected))
+
+        # batched queries, the nearest matches range_extract
+        distance = np.array([2000, 1500, 1000])
+        indices = self.index.k_nearest(distance, 3)
+        self.assertEqual(indices.shape, (3, 3))
+        self.assertTrue(np.array_equal(indices[:, 0], np.array([80, 1782, 674]) - 1))
+
+        # more than k routes at the same distance below the query
+        index = RouteIndex(np.array([100., 100., 100.]))
+        self.assertEqual(index.k_nearest(150, 1).tolist(), [0])
+        self.assertEqual(index.k_nearest([150, 50], 2).tolist(), [[0, 1], [0, 1]])
+
+        index = RouteIndex(np.array([300., 100., 100., 200., 100.]))
+        self.assertEqual(index.k_nearest(160, 2).tolist(), [3, 1])
+        self.assertEqual(index.k_nearest(140, 3).tolist(), [1, 2, 4])
+
+    def test_demand_above(self):
+        indices = self.index.demand_above(1000)
+        expected = np.where(self.demand > 1000)[0]
+        self.assertTrue(np.array_equal(indices, expected))
+
+    def test_dataset(self):
+        dataset = Dataset()
+        dataset.inputs = load_data('inputs_before_3routes.mat')['Inputs']
+        self.assertTrue(dataset.route_index is dataset.route_index)
+
+        route_ind = dataset.route_index.within(500, 510)
+        self.assertTrue(np.all(dataset.inputs.RVector[route_ind] >= 500))
+
+
 class FilterDataTestCase(unittest.TestCase):
     """ test the filter_data function
     """
@@ -120,6 +197,155 @@ class FilterDataTestCase(unittest.TestCase):
 
         self.check_filtered(ac_ind, route_ind)
 
+    def test_contiguous(self):
+        data = np.arange(18*40, dtype=float).reshape(18, 40)
+
+        # contiguous selections are returned as read-only views
+        filtered = filter_data(data, np.arange(3, 7), np.arange(10, 30))
+        self.assertTrue(np.array_equal(filtered, data[3:7, 10:30]))
+        self.assertTrue(np.may_share_memory(filtered, data))
+        self.assertFalse(filtered.flags.writeable)
+
+        # anything else is gathered into a copy
+        ac_ind, route_ind = np.array([5, 3, 4]), np.array([10, 11, 13])
+        filtered = filter_data(data, ac_ind, route_ind)
+        self.assertTrue(np.array_equal(filtered, data[ac_ind][:, route_ind]))
+        self.assertFalse(np.may_share_memory(filtered, data))
+
+        # contiguous selections past the end of the data are not truncated
+        self.assertRaises(IndexError, filter_data, data, np.arange(16, 20), np.arange(10, 30))
+        self.assertRaises(IndexError, filter_data, data, np.arange(3, 7), np.arange(30, 41))
+
+
+class LazyDatasetTestCase(unittest.TestCase):
+    """ test that the dataset is loaded on demand
+    """
+
+    def test_lazy(self):
+        dataset = Dataset(suffix='after_3routes')
+        self.assertFalse('inputs' in dataset.__dict__)
+
+        self.assertEqual(len(dataset.inputs.RVector), 3)
+        self.assertTrue('inputs' in dataset.__dict__)
+        self.assertFalse('coefficients' in dataset.__dict__)
+
+        # with the cache, each table is mapped on first access
+        coefficients = dataset.coefficients
+        self.assertFalse('Fuelburn' in coefficients.__dict__)
+        self.assertEqual(coefficients.Doc.shape, (2, 3))
+        self.assertFalse('Fuelburn' in coefficients.__dict__)
+
+    def test_prefetch(self):
+        dataset = Dataset(suffix='after_3routes')
+        dataset.constants = None  # not included in the bundled data
+
+        dataset.prefetch()
+        for key in ['inputs', 'outputs', 'coefficients']:
+            self.assertTrue(key in dataset.__dict__)
+        self.assertTrue('Fuelburn' in dataset.coefficients.__dict__)
+
+
+class FilteredDatasetTestCase(unittest.TestCase):
+    """ test the non-destructive dataset filter
+    """
+
+    def setUp(self):
+        # the bundled data has no Constants, so they are made up
+        self.base = Dataset()
+        for key in ['Inputs', 'Outputs', 'Coefficients']:
+            setattr(self.base, key.lower(), load_data(key.lower() + '_before_31routes.mat')[key])
+        self.base.constants = MatStruct(['MH'])
+        self.base.constants.MH = np.linspace(0.1, 0.5, 18)
+
+        self.ac_ind   = np.array([6, 10, 4, 9,  3, 8]) - 1
+        self.ac_num   = np.array([1,  7, 2, 8, 19, 1])
+        self.distance = np.array([
+            113, 174, 289, 303, 324, 331,  342,  375,  407, 427,
+            484, 486, 531, 543, 550, 570,  594,  609,  622, 680,
+            747, 758, 760, 823, 837, 991, 1098, 1231, 1407, 1570, 1626
+        ])
+        self.dvector  = np.column_stack((np.arange(1, 32), np.arange(100, 131)))
+
+    def test_filtered(self):
+        scenario = self.base.filtered(self.ac_ind, self.ac_num, self.distance, self.dvector)
+
+        # the base dataset is unchanged
+        self.assertEqual(self.base.inputs.RVector.shape, (2134,))
+        self.assertEqual(self.base.coefficients.Fuelburn.shape, (18, 2134))
+
+        # the filtered tables match the MATLAB results
+        coefficients = load_data('coefficients_after_31routes.mat')['Coefficients']
+        outputs      = load_data('outputs_after_31routes.mat')['Outputs']
+        for name in ['Fuelburn', 'Doc', 'Nox', 'BlockTime']:
+            self.assertTrue(np.allclose(getattr(scenario.coefficients, name),
+                                        getattr(coefficients, name)), msg=name)
+        self.assertTrue(np.allclose(scenario.outputs.TicketPrice, outputs.TicketPrice))
+
+        # and match those of the (in place) filter
+        dataset = self.base.copy()
+        dataset.filter(self.ac_ind, self.ac_num, self.distance, self.dvector)
+        for key in ['inputs', 'constants']:
+            for name in ['RVector', 'AvailPax', 'ACNum', 'MaxTrip', 'MH']:
+                if hasattr(getattr(dataset, key), name):
+                    self.assertTrue(np.allclose(getattr(getattr(scenario, key), name),
+                                                getattr(getattr(dataset, key), name)), msg=name)
+        self.assertEqual(scenario.constants.FuelCost, dataset.constants.FuelCost)
+
+        # unfiltered fields are those of the base dataset
+        self.assertTrue(scenario.inputs.RMatrix is self.base.inputs.RMatrix)
+
+    def test_replace(self):
+        scenario = self.base.filtered(self.ac_ind, self.ac_num, self.distance, self.dvector)
+        fuelburn = scenario.coefficients.Fuelburn
+
+        other = scenario.replace(ac_num=2*self.ac_num, fuel_cost=0.3)
+        self.assertTrue(other.coefficients.Fuelburn is fuelburn)
+        self.assertEqual(other.constants.FuelCost, 0.3)
+        self.assertEqual(scenario.constants.FuelCost, 0.2431)
+        self.assertTrue(np.allclose(other.inputs.MaxTrip, 2*scenario.inputs.MaxTrip))
+
+        self.assertRaises(TypeError, scenario.replace, ac_ind=[0])
+
+    def test_max_trip(self):
+        scenario = self.base.filtered(self.ac_ind, self.ac_num, self.distance, self.dvector,
+                                      add_trip=1)
+
+        # reference: the original loop over aircraft and routes
+        BlockTime = scenario.coefficients.BlockTime
+        MH = scenario.constants.MH
+        K, J = BlockTime.shape
+        expected = np.zeros(K*J)
+        for kk in range(K):
+            for jj in range(J):
+                expected[kk*J + jj] = self.ac_num[kk] \
+                    * np.ceil(12./(BlockTime[kk, jj] * (1 + MH[kk]) + 1)) + 1
+
+        self.assertTrue(np.array_equal(scenario.inputs.MaxTrip, expected))
+        self.assertTrue(scenario.inputs.MaxTrip is scenario.inputs.MaxTrip)
+
+    def test_compact(self):
+        scenario = self.base.filtered(self.ac_ind, self.ac_num, self.distance, self.dvector)
+        data = scenario.compact()
+
+        for key, fields in [('inputs',       ['RVector', 'DVector', 'AvailPax', 'ACNum', 'MaxTrip']),
+                            ('outputs',      ['TicketPrice']),
+                            ('constants',    ['MH']),
+                            ('coefficients', ['Fuelburn', 'Doc', 'Nox', 'BlockTime'])]:
+            for field in fields:
+                value = getattr(getattr(data, key), field)
+                self.assertEqual(value.dtype, np.float64)
+                self.assertTrue(value.flags.c_contiguous)
+                self.assertTrue(np.array_equal(value, getattr(getattr(scenario, key), field)))
+        self.assertEqual(data.constants.FuelCost, 0.2431)
+        self.assertEqual(data.inputs.TurnAround, 1.)
+        self.assertFalse(hasattr(data.inputs, '__dict__'))
+
+        # pickles to (little more than) the size of the arrays
+        pickled = pickle.loads(pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+        self.assertTrue(np.array_equal(pickled.inputs.MaxTrip, data.inputs.MaxTrip))
+        self.assertEqual(pickled.nbytes, data.nbytes)
+        self.assertTrue(len(pickle.dumps(data, pickle.HIGHEST_PROTOCOL)) < 2*data.nbytes)
+
 
 class DatasetFilterTestCase(unittest.TestCase):
     """ test the dataset filter function
@@ -0,0 +1,105 @@
+import unittest
+
+import numpy as np
+
+from airline_alloc.heuristics import Heuristics, heuristics
+from airline_alloc.nodes import NodeSolver
+from airline_alloc.optimization import Formulation
+from airline_alloc.test.test_optimization import branch_cut_3routes, dataset_3routes, expected_x
+
+
+class HeuristicsTestCase(unittest.TestCase):
+    """ test the primal heuristics on the root of the 3 route problem
+    """
+
+    def setUp(self):
+        self.form = form = Formulation(dataset_3routes())
+        self.node_solver = NodeSolver('linprog', form.f, form.A, form.b, form.lb, form.ub, None, None)
+
+        # the LP relaxation of the root problem
+        self.x, self.fun, eflag, iterations, basis = self.node_solver.solve({})
+        self.assertEqual(eflag, 1)
+
+    def tearDown(self):
+        self.node_solver.delete()
+
+    def heuristics(self, names):
+        form = self.form
+        return Heuristics(names, self.node_solver, form.f, form.A, form.b, len(form.f_int))
+
+    def check(self, x):
+        """ x is an integer solution of the problem
+        """
+        form = self.form
+        self.assertTrue(x is not None)
+        self.assertTrue(np.all(x[:6] == np.round(x[:6])))
+        self.assertTrue(np.all(form.A.dot(x) <= form.b.flatten() + 1e-06))
+        self.assertTrue(np.all(x >= form.lb.flatten()))
+        self.assertTrue(np.all(x <= form.ub.flatten()))
+        self.assertTrue(form.f.dot(x) >= self.fun)
+
+    def test_rows(self):
+        heur = self.heuristics([])
+
+        # the utilization rows (A3) are the rows with only trips
+        J, K = self.form.J, self.form.K
+        self.assertEqual(heur.A_int.shape, (K, K*J))
+        self.assertTrue(np.allclose(heur.A_int, self.form.A[2*J:2*J+K, :K*J]))
+
+    def test_heuristics(self):
+        heur = self.heuristics(sorted(heuristics))
+
+        for name, heuristic in heur.heuristics:
+            x = heuristic(heur, self.x.copy(), {})
+            self.check(x)
+
+        # within the bounds of a node
+        bounds = {1: (0., 5.)}
+        for name, heuristic in heur.heuristics:
+            x = heuristic(heur, self.x.copy(), dict(bounds))
+            self.check(x)
+            self.assertTrue(x[1] <= 5)
+
+        # the best of the solutions is better than a bad incumbent
+        name, x, fun = heur.run(self.x, {}, U_best=0.)
+        self.check(x)
+        self.assertTrue(fun < 0.)
+        self.assertTrue(heur.run(self.x, {}, U_best=fun) is None)
+        self.assertTrue(heur.solves > 0)
+
+    def test_custom(self):
+        def floor(heur, x, bounds):
+            return heur.fix(np.floor(x[:heur.num_int]), bounds)
+
+        heur = self.heuristics([floor])
+
+        name, x, fun = heur.run(self.x, {})
+        self.assertEqual(name, 'floor')
+        self.check(x)
+        self.assertEqual(x[:6].tolist(), np.floor(self.x[:6]).tolist())
+
+        self.assertRaises(ValueError, self.heuristics, ['feasibility pump'])
+
+    def test_due(self):
+        heur = self.heuristics(['rounding'])
+        self.assertEqual([i for i in xrange(1, 31) if heur.due(i)], [1, 10, 20, 30])
+
+        self.assertFalse(self.heuristics([]).due(1))
+
+
+class BranchCutTestCase(unittest.TestCase):
+    """ test branch_cut with heuristics
+    """
+
+    def test_3routes(self):
+        for workers in (None, 2):
+            xopt, fopt, can_x, can_F, x_best_relax, f_best_relax, funCall, eflag = \
+                branch_cut_3routes(backend='linprog', node_select='best-bound', workers=workers,
+                                   heuristics=('rounding', 'diving', 'fix-and-resolve'))
+
+            self.assertEqual(eflag, 1)
+            self.assertTrue(np.allclose(xopt, expected_x))
+
+
+if __name__ == "__main__":
+    unittest.main()
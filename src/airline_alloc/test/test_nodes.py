@@ -0,0 +1,247 @@
+import unittest
+
+import numpy as np
+
+from airline_alloc import backends, nodes
+from airline_alloc.nodes import ModelBounds, NodeQueue, NodeSolver, Pseudocosts
+
+
+class Node(object):
+    def __init__(self, name, b_F=0, depth=0, estimate=0):
+        self.name = name
+        self.b_F = b_F
+        self.depth = depth
+        self.estimate = estimate
+
+
+class NodeQueueTestCase(unittest.TestCase):
+    """ test the NodeQueue class
+    """
+
+    def pop_all(self, queue):
+        names = []
+        while len(queue) > 0:
+            names.append(queue.pop().name)
+        return names
+
+    def test_rules(self):
+        nodes = [
+            Node('a', b_F=-10, depth=1, estimate=-5),
+            Node('b', b_F=-20, depth=3, estimate=-1),
+            Node('c', b_F=-10, depth=2, estimate=-8),
+            Node('d', b_F=-15, depth=3, estimate=-9),
+        ]
+
+        expected = {
+            'max-bound':     ['c', 'a', 'd', 'b'],
+            'best-bound':    ['b', 'd', 'c', 'a'],
+            'depth-first':   ['d', 'b', 'c', 'a'],
+            'best-estimate': ['d', 'c', 'a', 'b'],
+        }
+
+        for rule, names in expected.iteritems():
+            queue = NodeQueue(rule)
+            for node in nodes:
+                queue.push(node)
+            self.assertEqual(self.pop_all(queue), names)
+
+    def test_legacy(self):
+        # the original rule: the last of the nodes with the highest value
+        values = np.random.RandomState(0).randint(0, 5, 50)
+        nodes = [Node(i, b_F=value) for i, value in enumerate(values)]
+
+        queue = NodeQueue()
+        for node in nodes:
+            queue.push(node)
+
+        Aset = list(nodes)
+        while len(Aset) > 0:
+            Fsub = -np.inf
+            for ii in range(len(Aset)):
+                if Aset[ii].b_F >= Fsub:
+                    Fsub_i = ii
+                    Fsub = Aset[ii].b_F
+            self.assertEqual(queue.pop().name, Aset[Fsub_i].name)
+            del Aset[Fsub_i]
+
+    def test_prune(self):
+        queue = NodeQueue('best-bound')
+        for i, bound in enumerate([-10, -20, -15, -5, -12]):
+            queue.push(nodes.Node(b_F=bound, node=i))
+
+        # the nodes whose bound is not better than the incumbent
+        self.assertEqual(queue.prune(-12), 3)
+        self.assertEqual(queue.prune(-12), 0)
+        self.assertEqual([queue.pop().node for i in xrange(len(queue))], [1, 2])
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, NodeQueue, 'breadth-first')
+
+
+class PseudocostsTestCase(unittest.TestCase):
+    """ test the Pseudocosts class
+    """
+
+    def test_estimates(self):
+        pc = Pseudocosts(3)
+
+        # no history, unit costs
+        down, up = pc.estimates(10., np.array([1.25, 2., 0.5]), 0)
+        self.assertAlmostEqual(down, 10. + 0.25 + 0.5)
+        self.assertAlmostEqual(up, 10. + 0.75 + 0.5)
+
+        pc.update(0, 0, 0.5, 2.)    # down cost 4
+        pc.update(0, 1, 0.5, 1.)    # up cost 2
+        pc.update(0, 1, 0.5, 3.)    # up cost 6, average 4
+
+        costs = pc.costs()
+        self.assertEqual(costs[:, 0].tolist(), [4., 4.])
+        self.assertEqual(costs[:, 1].tolist(), [4., 4.])
+
+        pc.update(2, 1, 0.25, 0.25)     # up cost 1
+        costs = pc.costs()
+        self.assertEqual(costs[1].tolist(), [4., 2.5, 1.])
+
+        down, up = pc.estimates(10., np.array([1.25, 2., 0.5]), 2)
+        self.assertAlmostEqual(down, 10. + min(4*0.25, 4*0.75) + 4*0.5)
+        self.assertAlmostEqual(up, 10. + min(4*0.25, 4*0.75) + 1*0.5)
+
+
+class BoundsRecorder(object):
+    """ records the bound changes made to an LP model
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def set_bounds(self, lb, ub, index=None):
+        self.calls.append((list(index), list(lb), list(ub)))
+
+
+class NodeTestCase(unittest.TestCase):
+    """ test the Node and ModelBounds classes
+    """
+
+    def test_bounds(self):
+        root = nodes.Node()
+        a = nodes.Node(root, ((0, 0., 2.),))
+        b = nodes.Node(a, ((1, 3., 8.),))
+        c = nodes.Node(b, ((0, 1., 2.),))
+        d = nodes.Node(a, ((2, 0., 0.),))
+
+        self.assertEqual(root.bounds(), {})
+        self.assertEqual(c.depth, 3)
+        self.assertEqual(c.bounds(), {0: (1., 2.), 1: (3., 8.)})
+
+        lp = BoundsRecorder()
+        bounds = ModelBounds(np.zeros(3), [5., 8., 5.])
+
+        bounds.apply(c, lp)
+        self.assertEqual(lp.calls[-1], ([0, 1], [1., 3.], [2., 8.]))
+
+        # only the bounds that differ from the last node are changed
+        bounds.apply(b, lp)
+        self.assertEqual(lp.calls[-1], ([0], [0.], [2.]))
+
+        bounds.apply(d, lp)
+        self.assertEqual(lp.calls[-1], ([1, 2], [0., 0.], [8., 0.]))
+        self.assertEqual(bounds.lb.tolist(), [0., 0., 0.])
+        self.assertEqual(bounds.ub.tolist(), [2., 8., 0.])
+
+        bounds.apply(d, lp)
+        self.assertEqual(len(lp.calls), 3)
+
+        bounds.apply(root, lp)
+        self.assertEqual(lp.calls[-1], ([0, 2], [0., 0.], [5., 5.]))
+        self.assertEqual(bounds.changed, set())
+
+    def test_size(self):
+        # a node holds no arrays
+        node = nodes.Node(nodes.Node(), ((0, 0., 2.),), -1.)
+        self.assertFalse(hasattr(node, '__dict__'))
+
+        # the inherited bound is kept when the node is solved
+        node.b_F = 3.
+        self.assertEqual(node.bound, -1.)
+
+
+class NodeSolverTestCase(unittest.TestCase):
+    """ test the NodeSolver class
+
+        maximize x + y  s.t.  x + 2y <= 4,  3x + y <= 5,  0 <= x, y
+    """
+
+    args = (np.array([-1., -1.]), np.array([[1., 2.], [3., 1.]]), np.array([4., 5.]),
+            np.array([0., 0.]), np.array([np.inf, np.inf]), None, None)
+
+    def test_rows(self):
+        solver = NodeSolver('linprog', *self.args)
+
+        x, fun, eflag, iterations, basis = solver.solve({})
+        self.assertTrue(np.allclose(x, [1.2, 1.4]))
+
+        # the rows added to the root problem, x <= 1
+        rows = (np.array([[1., 0.]]), np.array([1.]))
+        x, fun, eflag, iterations, basis = solver.solve({}, rows=rows)
+        self.assertTrue(np.allclose(x, [1., 1.5]))
+        self.assertEqual(solver.rows_added, 1)
+
+        # only the rows the model does not have are added
+        rows = (np.array([[1., 0.], [0., 1.]]), np.array([1., 1.]))
+        x, fun, eflag, iterations, basis = solver.solve({}, rows=rows)
+        self.assertTrue(np.allclose(x, [1., 1.]))
+        self.assertEqual(solver.lp.A.shape, (4, 2))
+
+        x, fun, eflag, iterations, basis = solver.solve({}, rows=rows)
+        self.assertEqual(solver.lp.A.shape, (4, 2))
+
+        # and the bounds of a node apply on top of them
+        x, fun, eflag, iterations, basis = solver.solve({0: (0., 0.5)}, rows=rows)
+        self.assertTrue(np.allclose(x, [0.5, 1.]))
+
+    def test_basis(self):
+        solver = NodeSolver('linprog', *self.args)
+        solver.lp = BasisBackend()
+        solver.lp.load(*self.args)
+
+        x, fun, eflag, iterations, basis = solver.solve({})
+        self.assertEqual(basis, (0, 1))
+        self.assertEqual(solver.lp.calls, ['reset_basis'])
+
+        # warm started from a basis of the same rows
+        x, fun, eflag, iterations, basis = solver.solve({}, basis)
+        self.assertEqual(solver.lp.calls[-1], ('set_basis', 1))
+
+        # but not from a basis from before rows were added
+        rows = (np.array([[1., 0.]]), np.array([1.]))
+        x, fun, eflag, iterations, basis = solver.solve({}, basis, rows)
+        self.assertEqual(solver.lp.calls[-1], 'reset_basis')
+        self.assertEqual(basis, (1, 3))
+
+
+class BasisBackend(backends.LinprogBackend):
+    """ a linprog backend that records how it is started, the basis of each
+        solve is the number of the solve
+    """
+
+    def load(self, *args, **kwargs):
+        self.calls = []
+        self.solves = 0
+        super(BasisBackend, self).load(*args, **kwargs)
+
+    def solve(self):
+        self.solves += 1
+        return super(BasisBackend, self).solve()
+
+    def get_basis(self):
+        return self.solves
+
+    def set_basis(self, basis):
+        self.calls.append(('set_basis', basis))
+
+    def reset_basis(self):
+        self.calls.append('reset_basis')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,78 +1,312 @@
 
+import multiprocessing
 import unittest
 from nose import SkipTest
 
 import numpy as np
+from scipy.sparse import issparse
 
+from airline_alloc import backends
+from airline_alloc.cache import MatStruct
 from airline_alloc.dataset import Dataset
 from airline_alloc.optimization import *
 
 
+def dataset_3routes():
+    """ the filtered 3 route dataset
+
+        the bundled data has no Constants, the values used here were
+        recovered from the MATLAB constraint matrix and MaxTrip
+    """
+    data = Dataset(suffix='after_3routes')
+    data.constants = MatStruct(['MH', 'FuelCost'])
+    data.constants.MH = np.array([0.936, 0.948])
+    data.constants.FuelCost = 0.2431
+    return data
+
+
+# the MATLAB solution of the 3 route problem
+expected_x = np.array([0, 3, 2, 2, 3, 0, 0, 321, 214, 244, 366, 0])
+expected_f = -19416.7711281234
+
+
+def branch_cut_3routes(**options):
+    """ solve the 3 route problem (see dataset_3routes) with branch_cut,
+        the options are passed to branch_cut
+    """
+    form = Formulation(dataset_3routes())
+
+    J = form.J
+    Aeq = np.ndarray(shape=(0, 0))
+    beq = np.ndarray(shape=(0, 0))
+
+    return branch_cut(form.f_int, form.f_con, form.A, form.b, Aeq, beq, form.lb, form.ub,
+                      range(2*J), range(2*J, form.A.shape[0]), [], [], **options)
+
+
 class ObjectiveTestCase(unittest.TestCase):
     """ test the get_objective function
     """
 
+    expected_int = np.array([
+        30078.1801074742,
+        23390.7454818768,
+        16779.0566092325,
+        35794.3199911030,
+        28282.0591370451,
+        20794.6131249422
+    ])
+
+    expected_con = np.array([
+        -295.868219080555,
+        -235.334963855215,
+        -176.747839203397,
+        -308.770102562314,
+        -248.293639817771,
+        -188.596040811846,
+    ])
+
     def test_3routes(self):
 
         data = Dataset(suffix='after_3routes')
 
         obj_int, obj_con = get_objective(data)
 
-        expected_int = np.array([
-            30078.1801074742,
-            23390.7454818768,
-            16779.0566092325,
-            35794.3199911030,
-            28282.0591370451,
-            20794.6131249422
-        ])
+        self.assertTrue(np.allclose(obj_int, self.expected_int))
+        self.assertTrue(np.allclose(obj_con, self.expected_con))
 
-        expected_con = np.array([
-            -295.868219080555,
-            -235.334963855215,
-            -176.747839203397,
-            -308.770102562314,
-            -248.293639817771,
-            -188.596040811846,
-        ])
+    def test_parametric(self):
+
+        data = dataset_3routes()
+
+        obj_int, obj_con = get_objective(data)
+
+        self.assertTrue(np.allclose(obj_int, self.expected_int))
+        self.assertTrue(np.allclose(obj_con, self.expected_con))
+
+        terms = get_objective_terms(data)
+
+        obj_int, obj_con = terms.evaluate(0.2431)
+        self.assertTrue(np.allclose(obj_int, self.expected_int))
+        self.assertTrue(np.allclose(obj_con, self.expected_con))
 
-        self.assertTrue(np.allclose(obj_int, expected_int))
-        self.assertTrue(np.allclose(obj_con, expected_con))
+        # sweep over fuel costs
+        fuelcost = np.array([0., 0.2431, 0.5])
+        obj_int, obj_con = terms.evaluate(fuelcost)
+        self.assertEqual(obj_int.shape, (3, 6))
+        self.assertTrue(np.allclose(obj_int[1], self.expected_int))
+        for i in range(3):
+            expected = data.coefficients.Doc.flatten() + fuelcost[i]*data.coefficients.Fuelburn.flatten()
+            self.assertTrue(np.allclose(obj_int[i], expected))
 
 
 class ConstraintsTestCase(unittest.TestCase):
     """ test the get_constraints function
     """
 
+    expected_A = np.array([
+        [0,       0,    0,   0,     0,    0,   1,   0,   0,   1,   0,   0],
+        [0,       0,    0,   0,     0,    0,   0,   1,   0,   0,   1,   0],
+        [0,       0,    0,   0,     0,    0,   0,   0,   1,   0,   0,   1],
+        [0,       0,    0,   0,     0,    0,  -1,   0,   0,  -1,   0,   0],
+        [0,       0,    0,   0,     0,    0,   0,  -1,   0,   0,  -1,   0],
+        [0,       0,    0,   0,     0,    0,   0,   0,  -1,   0,   0,  -1],
+        [10.4652511360000,    8.31288377600000,    6.15314412800000,    0,   0,   0,   0,   0,   0,   0,   0,   0],
+        [0,       0,    0,   10.4460000480000,    8.29977156800000,    6.14597705600000,    0,   0,   0,   0,   0,   0],
+        [-107,    0,    0,    0,    0,    0,   1,   0,   0,   0,   0,   0],
+        [0,    -107,    0,    0,    0,    0,   0,   1,   0,   0,   0,   0],
+        [0,       0, -107,    0,    0,    0,   0,   0,   1,   0,   0,   0],
+        [0,       0,    0, -122,    0,    0,   0,   0,   0,   1,   0,   0],
+        [0,       0,    0,    0, -122,    0,   0,   0,   0,   0,   1,   0],
+        [0,       0,    0,    0,    0, -122,   0,   0,   0,   0,   0,   1]
+    ])
+
+    expected_b = np.array([
+        300, 700, 220, -60, -140, -44, 72, 48, 0, 0, 0, 0, 0, 0
+    ]).reshape(-1, 1)
+
     def test_3routes(self):
 
         data = Dataset(suffix='after_3routes')
 
         A, b = get_constraints(data)
 
-        expected_A = np.array([
-            [0,       0,    0,   0,     0,    0,   1,   0,   0,   1,   0,   0],
-            [0,       0,    0,   0,     0,    0,   0,   1,   0,   0,   1,   0],
-            [0,       0,    0,   0,     0,    0,   0,   0,   1,   0,   0,   1],
-            [0,       0,    0,   0,     0,    0,  -1,   0,   0,  -1,   0,   0],
-            [0,       0,    0,   0,     0,    0,   0,  -1,   0,   0,  -1,   0],
-            [0,       0,    0,   0,     0,    0,   0,   0,  -1,   0,   0,  -1],
-            [10.4652511360000,    8.31288377600000,    6.15314412800000,    0,   0,   0,   0,   0,   0,   0,   0,   0],
-            [0,       0,    0,   10.4460000480000,    8.29977156800000,    6.14597705600000,    0,   0,   0,   0,   0,   0],
-            [-107,    0,    0,    0,    0,    0,   1,   0,   0,   0,   0,   0],
-            [0,    -107,    0,    0,    0,    0,   0,   1,   0,   0,   0,   0],
-            [0,       0, -107,    0,    0,    0,   0,   0,   1,   0,   0,   0],
-            [0,       0,    0, -122,    0,    0,   0,   0,   0,   1,   0,   0],
-            [0,       0,    0,    0, -122,    0,   0,   0,   0,   0,   1,   0],
-            [0,       0,    0,    0,    0, -122,   0,   0,   0,   0,   0,   1]
+        self.assertTrue(np.allclose(A, self.expected_A))
+        self.assertTrue(np.allclose(b, self.expected_b))
+
+    def test_sparse(self):
+
+        data = dataset_3routes()
+
+        A, b = get_constraints(data, sparse=True)
+
+        self.assertTrue(issparse(A))
+        self.assertEqual(A.nnz, 3*6 + 2*3*2)
+        self.assertTrue(np.allclose(A.toarray(), self.expected_A))
+        self.assertTrue(np.allclose(b, self.expected_b))
+
+        A_dense, b_dense = get_constraints(data)
+        self.assertTrue(np.array_equal(A_dense, A.toarray()))
+
+
+class FormulationTestCase(unittest.TestCase):
+    """ test the Formulation class
+    """
+
+    def test_3routes(self):
+        data = dataset_3routes()
+
+        form = Formulation(data)
+
+        self.assertTrue(np.allclose(form.f_int, ObjectiveTestCase.expected_int))
+        self.assertTrue(np.allclose(form.f_con, ObjectiveTestCase.expected_con))
+        self.assertTrue(np.allclose(form.A, ConstraintsTestCase.expected_A))
+        self.assertTrue(np.allclose(form.b, ConstraintsTestCase.expected_b))
+        self.assertTrue(np.allclose(form.ub[:6, 0], data.inputs.MaxTrip))
+        self.assertTrue(np.all(np.isinf(form.ub[6:])))
+
+    def test_update(self):
+        data = dataset_3routes()
+
+        form = Formulation(data, sparse=True)
+        A = form.A
+        b = form.b
+
+        # demand
+        dvector = data.inputs.DVector.copy()
+        dvector[:, 1] = [400, 500, 100]
+        form.update(dvector=dvector)
+
+        data.inputs.DVector = dvector
+        expected_A, expected_b = get_constraints(data)
+
+        self.assertTrue(form.A is A)
+        self.assertTrue(form.b is b)
+        self.assertTrue(np.allclose(form.b, expected_b))
+
+        # fleet size
+        trips = (data.inputs.MaxTrip.reshape(2, 3) / data.inputs.ACNum.reshape(-1, 1))
+        ac_num = np.array([3, 5])
+        form.update(ac_num=ac_num)
+
+        data.inputs.ACNum = ac_num
+        data.inputs.MaxTrip = (ac_num.reshape(-1, 1) * trips).flatten()
+        expected_A, expected_b = get_constraints(data)
+        expected_lb, expected_ub = get_bounds(data)
+
+        self.assertTrue(form.A is A)
+        self.assertTrue(np.allclose(form.A.toarray(), expected_A))
+        self.assertTrue(np.allclose(form.b, expected_b))
+        self.assertTrue(np.allclose(form.lb, expected_lb))
+        self.assertTrue(np.allclose(form.ub, expected_ub))
+
+        self.assertRaises(ValueError, form.update, dvector=dvector[:2])
+        self.assertRaises(ValueError, form.update, ac_num=[1, 2, 3])
+
+    def test_compact(self):
+        data = dataset_3routes()
+        compact = data.compact()
+
+        dvector = data.inputs.DVector.copy()
+        dvector[:, 1] = [400, 500, 100]
+        ac_num = np.array([3, 5])
+
+        expected = Formulation(data).update(dvector=dvector, ac_num=ac_num)
+        form = Formulation(compact).update(dvector=dvector, ac_num=ac_num)
+
+        self.assertTrue(np.allclose(form.f, expected.f))
+        self.assertTrue(np.allclose(form.A, expected.A))
+        self.assertTrue(np.allclose(form.b, expected.b))
+        self.assertTrue(np.allclose(form.ub, expected.ub))
+
+        # the compact dataset is replaced by an updated copy
+        self.assertTrue(np.array_equal(form.data.inputs.DVector, dvector))
+        self.assertTrue(np.array_equal(form.data.inputs.ACNum, ac_num))
+        self.assertTrue(np.allclose(form.data.inputs.MaxTrip, form.ub[:6, 0]))
+        self.assertTrue(form.data.coefficients is compact.coefficients)
+        self.assertTrue(np.array_equal(compact.inputs.DVector, data.inputs.DVector))
+
+    def test_hooks(self):
+        data = dataset_3routes()
+
+        def objective(data):
+            f_int, f_con = get_objective(data)
+            return 2 * f_int, f_con
+
+        def constraints(data):
+            A, b = get_constraints(data)
+            A[0, 0] = 5.
+            return A, b
+
+        form = Formulation(data, objective=objective, constraints=constraints)
+
+        self.assertTrue(np.allclose(form.f_int, 2 * ObjectiveTestCase.expected_int))
+        self.assertTrue(np.allclose(form.f_con, ObjectiveTestCase.expected_con))
+        self.assertEqual(form.A[0, 0], 5.)
+        self.assertTrue(np.allclose(form.A[1:], ConstraintsTestCase.expected_A[1:]))
+
+        # update still applies to the hooked formulation
+        dvector = data.inputs.DVector.copy()
+        dvector[:, 1] = [400, 500, 100]
+        form.update(dvector=dvector)
+        self.assertTrue(np.allclose(form.b[0:3, 0], [400, 500, 100]))
+        self.assertEqual(form.A[0, 0], 5.)
+
+
+class BatchTestCase(unittest.TestCase):
+    """ test the get_batch function
+    """
+
+    def test_3routes(self):
+        data = dataset_3routes()
+
+        dvectors = np.array([
+            [300, 700, 220],
+            [400, 500, 100],
+            [  0, 900, 250],
+        ])
+        ac_nums = np.array([
+            [6, 4],
+            [3, 5],
+            [0, 9],
         ])
 
-        expected_b = np.array([
-            300, 700, 220, -60, -140, -44, 72, 48, 0, 0, 0, 0, 0, 0
-        ]).reshape(-1, 1)
+        f, A, B, LB, UB = get_batch(data, dvectors, ac_nums)
+
+        self.assertTrue(issparse(A))
+        self.assertTrue(np.allclose(A.toarray(), ConstraintsTestCase.expected_A))
+        self.assertEqual(B.shape, (3, 14))
+        self.assertEqual(UB.shape, (3, 12))
+
+        for i in range(3):
+            dvector = np.column_stack((np.arange(1, 4), dvectors[i]))
+            form = Formulation(data).update(dvector=dvector, ac_num=ac_nums[i])
+
+            self.assertTrue(np.allclose(f, form.f))
+            self.assertTrue(np.allclose(B[i], form.b.flatten()))
+            self.assertTrue(np.allclose(LB[i], form.lb.flatten()))
+            self.assertTrue(np.allclose(UB[i], form.ub.flatten()))
 
-        self.assertTrue(np.allclose(A, expected_A))
-        self.assertTrue(np.allclose(b, expected_b))
+        # fleet size only, DVector arrays
+        f, A, B, LB, UB = get_batch(data, ac_nums=ac_nums)
+        self.assertEqual(B.shape, (3, 14))
+        self.assertTrue(np.allclose(B[:, 0:6], ConstraintsTestCase.expected_b[0:6].T))
+
+        dvector = data.inputs.DVector[np.newaxis]
+        f, A, B, LB, UB = get_batch(data, dvector)
+        self.assertTrue(np.allclose(B, ConstraintsTestCase.expected_b.T))
+
+        # a single DVector array is one scenario
+        f, A, B, LB, UB = get_batch(data, data.inputs.DVector)
+        self.assertEqual(B.shape, (1, 14))
+        self.assertTrue(np.allclose(B, ConstraintsTestCase.expected_b.T))
+
+        self.assertRaises(ValueError, get_batch, data, dvectors[:2], ac_nums)
+
+        # demand that does not match the number of routes
+        self.assertRaises(ValueError, get_batch, data, dvectors[:2, :2])
+        self.assertRaises(ValueError, get_batch, data, dvectors.flatten()[:8])
+        self.assertRaises(ValueError, get_batch, data, np.ones((2, 3, 3)))
 
 
 class GomoryCutTestCase(unittest.TestCase):
@@ -114,15 +348,75 @@ class GomoryCutTestCase(unittest.TestCase):
             'eflag': 1
         }
 
-        # call the function
-        A_up, b_up, eflag = gomory_cut(x, A, b, Aeq, beq)
+        # call the function, with the basis guessed from x, with the
+        # basis of the solution (both variables) and with a singular basis,
+        # which falls back to the basis guessed from x
+        for basis in (None, [0, 1], [1, 1]):
+            A_up, b_up, eflag = gomory_cut(x, A, b, Aeq, beq, basis=basis)
+
+            # check answer against expected results
+            self.assertTrue(np.allclose(A_up, expected['A_up']),
+                msg='\n' + str(A_up) + '\n' + str(expected['A_up']))
+            self.assertTrue(np.allclose(b_up, expected['b_up']),
+                msg='\n' + str(b_up) + '\n' + str(expected['b_up']))
+            self.assertTrue(eflag == expected['eflag'])
+
+        # with the basis of a solve of the LP whose solution is x,
+        # maximize x1 + x2
+        for solver in ('linprog', 'lpsolve'):
+            basis = solve_basis(solver, [-1., -1.], A, b)
+            if basis is None:
+                continue
+            self.assertEqual(sorted(basis), [0, 1])
+
+            A_up, b_up, eflag = gomory_cut(x, A, b, Aeq, beq, basis=basis)
+            self.assertTrue(np.allclose(A_up, expected['A_up']))
+            self.assertTrue(np.allclose(b_up, expected['b_up']))
+
+    def test_slack(self):
+        """ a basic slack is fractional, but the design variables are not
+        """
 
-        # check answer against expected results
-        self.assertTrue(np.allclose(A_up, expected['A_up']),
-            msg='\n' + str(A_up) + '\n' + str(expected['A_up']))
-        self.assertTrue(np.allclose(b_up, expected['b_up']),
-            msg='\n' + str(b_up) + '\n' + str(expected['b_up']))
-        self.assertTrue(eflag == expected['eflag'])
+        # minimize -x1 + x2  s.t.  x1 <= 2,  x1 + 0.5 x2 <= 3.3
+        A = np.array([
+            [1., 0. ],
+            [1., 0.5]
+        ])
+        b = np.array([
+            [2. ],
+            [3.3]
+        ])
+        Aeq = np.array([])
+        beq = np.array([])
+
+        for solver in ('linprog', 'lpsolve'):
+            basis = solve_basis(solver, [-1., 1.], A, b)
+            if basis is None:
+                continue
+
+            # x1 = 2 and the slack of the second row (1.3) are basic
+            self.assertEqual(sorted(basis), [0, 3])
+
+            # the row of the slack would give the cut x2 >= 0.6, which cuts
+            # off the integer solution x = (2, 0)
+            A_up, b_up, eflag = gomory_cut(np.array([[2.], [0.]]), A, b, Aeq, beq, basis=basis)
+            self.assertEqual(eflag, 0)
+            self.assertTrue(np.allclose(A_up, A))
+
+
+def solve_basis(solver, f, A, b):
+    """ the basic indices of the solution of  minimize f.x  s.t.  A x <= b,
+        x >= 0  with the given backend, or None if it is not available
+    """
+    lp = backends.get_backend(solver)
+    try:
+        lp.load(np.array(f), A, b, np.zeros(len(f)), np.inf * np.ones(len(f)))
+        x, fun, eflag = lp.solve()
+        return lp.get_basic_indices()
+    except ImportError:
+        return None
+    finally:
+        lp.delete()
 
 
 class CutPlaneTestCase(unittest.TestCase):
@@ -190,6 +484,18 @@ class CutPlaneTestCase(unittest.TestCase):
         self.assertTrue(np.allclose(b_up, expected['b_up']),
             msg='\n' + str(b_up) + '\n' + str(expected['b_up']))
 
+        # with the basis of a solve of the integer rows, whose solution is
+        # the integer part of x: maximize 2 x1 + 3 x2
+        for solver in ('linprog', 'lpsolve'):
+            basis = solve_basis(solver, [-2., -3.], A[ind_int, :num_int], b[ind_int])
+            if basis is None:
+                continue
+
+            A_up, b_up  = cut_plane(x, A, b, Aeq, beq, ind_con, ind_int, indeq_con, indeq_int, num_int,
+                                    basis=basis)
+            self.assertTrue(np.allclose(A_up, expected['A_up']))
+            self.assertTrue(np.allclose(b_up, expected['b_up']))
+
     def test_problem2(self):
         """ another test problem
             (FIXME: this demonstrates a case where cut_plane does not work as expected)
@@ -355,6 +661,145 @@ class BranchCutTestCase(unittest.TestCase):
         # TODO: check return values against MATLAB results
 
 
+    def test_linprog(self):
+        for presolve in (False, True):
+            xopt, fopt, can_x, can_F, x_best_relax, f_best_relax, funCall, eflag = \
+                branch_cut_3routes(presolve=presolve, backend='linprog')
+
+            self.assertEqual(eflag, 1)
+            self.assertTrue(np.allclose(xopt, expected_x))
+            self.assertAlmostEqual(fopt, expected_f, places=4)
+
+    def test_node_select(self):
+        for rule in ('best-bound', 'depth-first', 'best-estimate'):
+            xopt, fopt, can_x, can_F, x_best_relax, f_best_relax, funCall, eflag = \
+                branch_cut_3routes(backend='linprog', node_select=rule)
+
+            self.assertEqual(eflag, 1)
+            self.assertTrue(np.allclose(xopt, expected_x))
+
+    def test_workers(self):
+        results = []
+        for workers in (2, 2, 3):
+            xopt, fopt, can_x, can_F, x_best_relax, f_best_relax, funCall, eflag = \
+                branch_cut_3routes(backend='linprog', node_select='best-bound', workers=workers)
+
+            self.assertEqual(eflag, 1)
+            self.assertTrue(np.allclose(xopt, expected_x))
+            results.append((fopt, funCall))
+
+        # the same number of workers gives the same tree
+        self.assertEqual(results[0], results[1])
+
+        # also when each worker keeps its lp_solve model between nodes
+        try:
+            from lpsolve55 import lpsolve
+        except ImportError:
+            raise SkipTest('lpsolve is not available')
+
+        results = []
+        for workers in (2, 2, 2):
+            xopt, fopt, can_x, can_F, x_best_relax, f_best_relax, funCall, eflag = \
+                branch_cut_3routes(backend='lpsolve', node_select='best-bound', workers=workers)
+
+            self.assertEqual(eflag, 1)
+            results.append((fopt, funCall, tuple(xopt)))
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
+    def test_cleanup(self):
+        RecordingBackend.calls = []
+
+        # an invalid argument is found after the LP model is loaded
+        self.assertRaises(ValueError, self.branch_cut, RecordingBackend,
+                          heuristics=('feasibility pump',))
+
+        calls = [call[0] for call in RecordingBackend.calls]
+        self.assertEqual(calls.count('load'), 1)
+        self.assertEqual(calls.count('delete'), 1)
+
+        # or after the worker processes are started, with the LP model of
+        # the heuristics
+        RecordingBackend.calls = []
+        self.assertRaises(ValueError, self.branch_cut, RecordingBackend, workers=2,
+                          heuristics=('feasibility pump',))
+        self.assertEqual(multiprocessing.active_children(), [])
+
+        calls = [call[0] for call in RecordingBackend.calls]
+        self.assertEqual(calls.count('load'), 1)
+        self.assertEqual(calls.count('delete'), 1)
+
+    def branch_cut(self, solver, **options):
+        backends.backends[solver.__name__] = solver
+        try:
+            return branch_cut_3routes(backend=solver.__name__, **options)
+        finally:
+            del backends.backends[solver.__name__]
+
+    def test_live_model(self):
+        RecordingBackend.calls = []
+
+        xopt, fopt, can_x, can_F, x_best_relax, f_best_relax, funCall, eflag = \
+            self.branch_cut(RecordingBackend)
+
+        # one model for the tree, modified by bound changes only
+        calls = [call[0] for call in RecordingBackend.calls]
+        self.assertEqual(eflag, 1)
+        self.assertEqual(calls.count('load'), 1)
+        self.assertEqual(calls.count('solve'), funCall)
+        self.assertTrue(calls.count('set_bounds') > 0)
+        self.assertTrue(max(call[1] for call in RecordingBackend.calls
+                            if call[0] == 'set_bounds') <= 6)
+
+    def test_warm_start(self):
+        RecordingBackend.calls = []
+
+        xopt, fopt, can_x, can_F, x_best_relax, f_best_relax, funCall, eflag = \
+            self.branch_cut(RecordingBackend)
+
+        # every node but the root starts from the basis of an earlier solve
+        solves = 0
+        for call in RecordingBackend.calls:
+            if call[0] == 'solve':
+                solves += 1
+            elif call[0] == 'set_basis':
+                self.assertTrue(call[1] <= solves)
+        self.assertEqual(solves, funCall)
+        self.assertEqual([call[0] for call in RecordingBackend.calls].count('set_basis'), funCall - 1)
+
+
+class RecordingBackend(backends.LinprogBackend):
+    """ a linprog backend that records the calls made by branch_cut,
+        the basis of each solve is the number of the solve
+    """
+
+    calls = []
+
+    def load(self, *args, **kwargs):
+        self.calls.append(('load',))
+        self.solves = 0
+        super(RecordingBackend, self).load(*args, **kwargs)
+
+    def solve(self):
+        self.calls.append(('solve',))
+        self.solves += 1
+        return super(RecordingBackend, self).solve()
+
+    def set_bounds(self, lb, ub, index=None):
+        self.calls.append(('set_bounds', len(index)))
+        super(RecordingBackend, self).set_bounds(lb, ub, index)
+
+    def get_basis(self):
+        return self.solves
+
+    def set_basis(self, basis):
+        self.calls.append(('set_basis', basis))
+
+    def delete(self):
+        self.calls.append(('delete',))
+
+
 class OutputTestCase(unittest.TestCase):
     """ test the output function
     """
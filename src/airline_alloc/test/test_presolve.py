@@ -0,0 +1,117 @@
+import unittest
+
+import numpy as np
+from scipy.optimize import linprog
+from scipy.sparse import issparse
+
+from airline_alloc.optimization import Formulation
+from airline_alloc.presolve import Presolve
+from airline_alloc.test.test_optimization import dataset_3routes
+
+
+def solve_relaxed(f, A, b, lb, ub):
+    """ solve the LP relaxation with linprog
+    """
+    A = A.toarray() if issparse(A) else A
+    bounds = zip(lb.flatten(), [None if np.isinf(u) else u for u in ub.flatten()])
+    return linprog(f, A_ub=A, b_ub=b.flatten(), bounds=bounds, method='interior-point')
+
+
+class PresolveTestCase(unittest.TestCase):
+    """ test the Presolve class
+    """
+
+    def presolve(self, form, sparse=False):
+        full = solve_relaxed(form.f, form.A, form.b, form.lb, form.ub)
+        self.assertEqual(full.status, 0)
+
+        # with only continuous variables, the reduced problem has the same solution
+        pre = Presolve(form.f, form.A, form.b, form.lb, form.ub, 0)
+        self.assertFalse(pre.infeasible)
+
+        reduced = solve_relaxed(pre.f, pre.A, pre.b, pre.lb, pre.ub)
+        self.assertEqual(reduced.status, 0)
+        self.assertTrue(np.isclose(pre.objective(reduced.fun), full.fun, rtol=1e-6))
+
+        x = pre.postsolve(reduced.x)
+        self.assertEqual(len(x), len(form.f))
+        self.assertTrue(np.isclose(form.f.dot(x), full.fun, rtol=1e-6))
+        A = form.A.toarray() if issparse(form.A) else form.A
+        self.assertTrue(np.all(A.dot(x) <= form.b.flatten() + 1e-6))
+
+        # rounding the bounds of the integer variables tightens the relaxation
+        pre = Presolve(form.f, form.A, form.b, form.lb, form.ub, len(form.f_int))
+        self.assertFalse(pre.infeasible)
+        self.assertEqual(issparse(pre.A), sparse)
+
+        reduced = solve_relaxed(pre.f, pre.A, pre.b, pre.lb, pre.ub)
+        self.assertEqual(reduced.status, 0)
+        self.assertTrue(pre.objective(reduced.fun) >= full.fun - 1e-6*abs(full.fun))
+
+        return pre
+
+    def test_3routes(self):
+        form = Formulation(dataset_3routes())
+
+        pre = self.presolve(form)
+
+        # nothing is fixed, but the trips are bounded by the utilization
+        # and the passengers by the demand and capacity
+        self.assertEqual(len(pre.cols), 12)
+        self.assertEqual(len(pre.rows), 14)
+        self.assertEqual(pre.num_int, 6)
+        self.assertEqual(pre.ub[:6].flatten().tolist(), [6, 8, 11, 4, 5, 7])
+        self.assertTrue(np.all(pre.ub[6:].flatten() <= [300, 700, 220, 300, 700, 220]))
+
+        # the MATLAB solution is feasible for the reduced problem
+        xopt = np.array([0, 3, 2, 2, 3, 0, 0, 321, 214, 244, 366, 0])
+        x = xopt[pre.cols]
+        self.assertTrue(np.all(x >= pre.lb.flatten()))
+        self.assertTrue(np.all(x <= pre.ub.flatten()))
+        self.assertTrue(np.all(pre.A.dot(x) <= pre.b.flatten() + 1e-6))
+
+    def test_zero_fleet(self):
+        form = Formulation(dataset_3routes(), sparse=True)
+        form.update(ac_num=[6, 0])
+
+        pre = self.presolve(form, sparse=True)
+
+        # the trips and passengers of the second aircraft are fixed at 0
+        self.assertEqual(pre.cols.tolist(), [0, 1, 2, 6, 7, 8])
+        self.assertEqual(pre.num_int, 3)
+        self.assertTrue(np.all(pre.x_fixed == 0))
+        self.assertEqual(pre.offset, 0)
+
+        # and its utilization row is gone
+        self.assertTrue(7 not in pre.rows)
+        self.assertEqual(pre.row_indices([6, 7]), [pre.rows.tolist().index(6)])
+
+        x = pre.postsolve([[], np.arange(6)])[1]
+        self.assertEqual(x.tolist(), [0, 1, 2, 0, 0, 0, 3, 4, 5, 0, 0, 0])
+
+    def test_zero_demand(self):
+        data = dataset_3routes()
+        dvector = data.inputs.DVector.copy()
+        dvector[2, 1] = 0
+
+        form = Formulation(data)
+        form.update(dvector=dvector)
+
+        pre = self.presolve(form)
+
+        # the passengers on the third route are fixed at 0
+        # and its lower demand row is redundant
+        self.assertTrue(8 not in pre.cols)
+        self.assertTrue(11 not in pre.cols)
+        self.assertTrue(5 not in pre.rows)
+
+    def test_infeasible(self):
+        form = Formulation(dataset_3routes())
+        form.lb[0] = 13
+
+        pre = Presolve(form.f, form.A, form.b, form.lb, form.ub, len(form.f_int))
+        self.assertTrue(pre.infeasible)
+
+
+if __name__ == "__main__":
+    unittest.main()
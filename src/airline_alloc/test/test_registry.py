@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from os.path import join
+
+import numpy as np
+from scipy.io import savemat
+
+from airline_alloc import cache
+from airline_alloc.dataset import load_data
+from airline_alloc.registry import DatasetRegistry
+
+
+def write_dataset(file_name, suffix):
+    """ combine the bundled data for the given suffix into a single file
+        (the bundled data has no Constants, so they are made up)
+    """
+    mat = {}
+    for key in ['Inputs', 'Outputs', 'Coefficients']:
+        struct = load_data(key.lower() + '_' + suffix + '.mat', cache=False)[key]
+        mat[key] = dict((field, getattr(struct, field)) for field in struct._fieldnames
+                        if isinstance(getattr(struct, field), np.ndarray)
+                        and getattr(struct, field).dtype != object)
+    K = len(mat['Inputs']['AvailPax'])
+    mat['Constants'] = {'MH': np.linspace(0.1, 0.5, K), 'FuelCost': 0.2431}
+    savemat(file_name, mat)
+
+
+class RegistryTestCase(unittest.TestCase):
+    """ test the dataset registry
+    """
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache_path = cache.cache_path
+        cache.cache_path = join(self.tempdir, 'cache')
+
+        self.file_name = join(self.tempdir, 'Dataset.mat')
+        write_dataset(self.file_name, 'after_3routes')
+
+    def tearDown(self):
+        cache.cache_path = self.cache_path
+        shutil.rmtree(self.tempdir)
+
+    def test_shared(self):
+        registry = DatasetRegistry()
+
+        data = registry.get(self.file_name)
+        self.assertTrue(registry.get(self.file_name) is data)
+        self.assertEqual(len(registry), 1)
+        self.assertTrue(registry.nbytes > 0)
+
+        # the registered dataset is read-only, copies can be filtered
+        self.assertFalse(data.coefficients.Fuelburn.flags.writeable)
+        copy = data.copy()
+        copy.coefficients.Fuelburn = copy.coefficients.Fuelburn[:, :1]
+        self.assertEqual(data.coefficients.Fuelburn.shape, (2, 3))
+
+    def test_read_only(self):
+        registry = DatasetRegistry()
+
+        data = registry.get(self.file_name)
+        fuelburn = data.coefficients.Fuelburn
+
+        # the structs of the shared dataset can not be changed
+        self.assertRaises(AttributeError, setattr, data.coefficients, 'Fuelburn', fuelburn[:, :1])
+        self.assertRaises(AttributeError, delattr, data.inputs, 'RVector')
+        self.assertRaises(AttributeError, data.filter, [0], [1], data.inputs.RVector[:2],
+                          np.array([[1, 100], [2, 200]]))
+        self.assertTrue(registry.get(self.file_name).coefficients.Fuelburn is fuelburn)
+
+        # a copy can be filtered
+        copy = data.copy()
+        copy.filter([0], [1], data.inputs.RVector[:2], np.array([[1, 100], [2, 200]]))
+        self.assertEqual(copy.coefficients.Fuelburn.shape, (1, 2))
+        self.assertEqual(data.coefficients.Fuelburn.shape, (2, 3))
+
+    def test_modified(self):
+        registry = DatasetRegistry()
+
+        data = registry.get(self.file_name)
+        os.utime(self.file_name, (0, 0))
+        self.assertFalse(registry.get(self.file_name) is data)
+        self.assertEqual(len(registry), 1)
+
+    def test_lru(self):
+        other = join(self.tempdir, 'Other.mat')
+        write_dataset(other, 'after_11routes')
+
+        registry = DatasetRegistry()
+        data = registry.get(self.file_name)
+        registry.max_bytes = registry.nbytes
+
+        registry.get(other)
+        self.assertEqual(len(registry), 1)
+        self.assertFalse(registry.get(self.file_name) is data)
+
+    def test_threads(self):
+        registry = DatasetRegistry()
+        results = []
+
+        def get():
+            results.append(registry.get(self.file_name))
+
+        threads = [threading.Thread(target=get) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(registry), 1)
+        self.assertTrue(all(data is results[0] for data in results))
+
+
+if __name__ == "__main__":
+    unittest.main()